@@ -0,0 +1,70 @@
+import pandas as pd
+import functools
+import os
+from df_cache import cache_df
+from cd_utils import EXCEL_ENGINE, parse_id_vec
+
+# ==========================================
+# ACS 特征加载 (data_merge.py / merge_2017_2019.py 共用)
+# ==========================================
+# 请确保脚本是在项目根目录下运行的
+FILE_DEMO = "extra_data/population_economy_data/Dem_1923_CDTA.xlsx"
+FILE_ECON = "extra_data/population_economy_data/Econ_1923_CDTA.xlsx"
+FILE_HOUS = "extra_data/population_economy_data/Hous_1923_CDTA.xlsx"
+
+@cache_df
+def _read_acs(fp, target_col_code, rename_to):
+    """读取单个 ACS 文件，只取 GeoID + 目标列，筛选曼哈顿"""
+    if not os.path.exists(fp):
+        print(f"❌ 找不到文件: {fp}")
+        return None
+    # 先只读表头，定位需要的两列，再只解析这两列
+    header = pd.read_excel(fp, engine=EXCEL_ENGINE, nrows=0).columns
+    # 找 GeoID 列
+    geo_col = [c for c in header if 'geo' in str(c).lower() and 'id' in str(c).lower()][0]
+
+    # 找目标列 (模糊匹配)
+    real_col = None
+    for c in header:
+        if c.lower() == target_col_code.lower():
+            real_col = c
+            break
+
+    # 经济数据的特殊处理 (有时叫 MedInc, 有时叫 MdHHIncE)
+    if not real_col and target_col_code == 'MdHHIncE':
+        for c in header:
+            if 'med' in c.lower() and 'inc' in c.lower() and 'moe' not in c.lower():
+                real_col = c
+                break
+
+    if not real_col: return None
+
+    df = pd.read_excel(fp, engine=EXCEL_ENGINE, usecols=[geo_col, real_col])
+    # 筛选曼哈顿
+    df = df[df[geo_col].astype(str).str.startswith('MN')].copy()
+    df['CD_ID'] = parse_id_vec(df[geo_col])
+    return df[['CD_ID', real_col]].rename(columns={real_col: rename_to})
+
+
+@functools.lru_cache(maxsize=1)
+def load_acs_features(file_demo=FILE_DEMO, file_econ=FILE_ECON, file_hous=FILE_HOUS):
+    """
+    一次性加载所有 ACS 特征 (人口/经济/住房)，按 CD_ID 合并成一张表。
+    同一进程内只解析一次 (lru_cache)；跨进程复用靠 _read_acs 的 Parquet 缓存。
+    注意返回的是共享对象，调用方不要原地修改。
+    """
+    print("📊 加载 ACS 2019-2023 特征 (人口/经济/住房)...")
+    parts = [
+        _read_acs(file_demo, 'Pop_1E', 'Population'),
+        _read_acs(file_econ, 'MdHHIncE', 'Median_Income'),
+        _read_acs(file_hous, 'HUs_1E', 'Housing_Units'),
+    ]
+    parts = [p for p in parts if p is not None]
+    if not parts:
+        return None
+
+    # 合并这三个
+    master_acs = parts[0]
+    for p in parts[1:]:
+        master_acs = master_acs.merge(p, on='CD_ID', how='left')
+    return master_acs
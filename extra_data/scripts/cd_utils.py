@@ -0,0 +1,26 @@
+import pandas as pd
+
+# ==========================================
+# 合并脚本共用的小工具 (社区编号解析 + Excel 引擎)
+# ==========================================
+# Excel 解析引擎: 优先 calamine (Rust 实现, 明显快于 openpyxl)，没装就退回 openpyxl
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = 'openpyxl'
+
+
+def parse_id_vec(s: pd.Series) -> pd.Series:
+    """统一 ID 为 101-112 (整列向量化处理, 无法识别的记为 <NA>; 值域很小, 用 Int8 存)"""
+    # 取最后一段数字: 'MN01' -> 1, '07 MANHATTAN' -> 7, '105' -> 105
+    digits = s.astype('string').str.extract(r'(\d+)(?!.*\d)', expand=False).astype('Int64')
+    out = digits.where((digits >= 101) & (digits <= 112), digits + 100)
+    return out.where((out >= 101) & (out <= 112)).astype('Int8')
+
+
+def parse_id_by_unique(s: pd.Series) -> pd.Series:
+    """低基数列 (只有十几个社区编号) 先对 unique 值解析, 再 map 回整列"""
+    uniq = s.dropna().unique()
+    mapping = dict(zip(uniq, parse_id_vec(pd.Series(uniq))))
+    return s.map(mapping).astype('Int8')
@@ -1,86 +1,32 @@
 import pandas as pd
-import re
+import numpy as np
 import os
+from df_cache import cache_df
+from cd_utils import parse_id_vec, parse_id_by_unique
+from acs_loader import load_acs_features
+from trash_loader import get_trash_indexed
 
 # ==========================================
 # 1. 文件配置 (请根据你的实际文件名修改!!)
 # ==========================================
 FILE_GEO = "raw_data/DSNY_Districts_20251130.csv"
-FILE_TRASH_ALL = "extra_data/garbage_data/Manhattan_Garbage_Ton_201701_202510.csv"  # 那个 2017-2025 的大文件
 FILE_RATS_OLD = "extra_data/rodent_data/Manhattan_Rodents_2017_2019_Baseline.csv"  # 你的老数据
 FILE_RATS_NEW = "extra_data/rodent_data/Manhattan_Rodents_2023_2025.csv"  # 你的新数据
-
-# ACS 数据 (主要用于 Current 阶段)
-FILE_DEMO = "extra_data/population_economy_data/Dem_1923_CDTA.xlsx"
-FILE_ECON = "extra_data/population_economy_data/Econ_1923_CDTA.xlsx"
-FILE_HOUS = "extra_data/population_economy_data/Hous_1923_CDTA.xlsx"
+# 垃圾总表 (2017-2025) 的路径与清洗统一放在 trash_loader.py
+# ACS 数据 (主要用于 Current 阶段) 的路径与读取统一放在 acs_loader.py
 
 
 # ==========================================
 # 2. 辅助工具
 # ==========================================
-def parse_id(val):
-    """统一 ID 为 101-112"""
-    s = str(val).upper().strip()
-    nums = re.findall(r'\d+', s)
-    if not nums: return None
-    num = int(nums[-1])
-    if 101 <= num <= 112: return num
-    if 1 <= num <= 12: return 100 + num
-    return None
-
-
-def load_geo():
+@cache_df
+def load_geo(path):
     print("🗺️  加载地图基底...")
-    df = pd.read_csv(FILE_GEO)
-    df['CD_ID'] = df['DISTRICTCODE'].apply(parse_id)
+    df = pd.read_csv(path, usecols=['DISTRICTCODE', 'DISTRICT', 'SHAPE_Area'])
+    df['CD_ID'] = parse_id_vec(df['DISTRICTCODE'])
     return df[(df['CD_ID'] >= 101) & (df['CD_ID'] <= 112)][['CD_ID', 'DISTRICT', 'SHAPE_Area']]
 
 
-def load_acs_features():
-    """一次性加载所有 ACS 特征 (人口/经济/住房)"""
-    print("📊 加载 ACS 2019-2023 特征 (作为当前状态)...")
-
-    # 内部小函数：读取单文件
-    def _read_acs(fp, target_col_code, rename_to):
-        if not os.path.exists(fp): return None
-        df = pd.read_excel(fp, engine='openpyxl')
-        # 找 GeoID 列
-        geo_col = [c for c in df.columns if 'geo' in str(c).lower() and 'id' in str(c).lower()][0]
-        # 筛选曼哈顿
-        df = df[df[geo_col].astype(str).str.startswith('MN')].copy()
-        df['CD_ID'] = df[geo_col].apply(parse_id)
-
-        # 找目标列 (模糊匹配)
-        real_col = None
-        for c in df.columns:
-            if c.lower() == target_col_code.lower():
-                real_col = c;
-                break
-
-        # 经济数据的特殊处理 (有时叫 MedInc, 有时叫 MdHHIncE)
-        if not real_col and target_col_code == 'MdHHIncE':
-            for c in df.columns:
-                if 'med' in c.lower() and 'inc' in c.lower() and 'moe' not in c.lower():
-                    real_col = c;
-                    break
-
-        if real_col:
-            return df[['CD_ID', real_col]].rename(columns={real_col: rename_to})
-        return None
-
-    df_pop = _read_acs(FILE_DEMO, 'Pop_1E', 'Population')
-    df_econ = _read_acs(FILE_ECON, 'MdHHIncE', 'Median_Income')
-    df_hous = _read_acs(FILE_HOUS, 'HUs_1E', 'Housing_Units')
-
-    # 合并这三个
-    master_acs = df_pop
-    if df_econ is not None: master_acs = master_acs.merge(df_econ, on='CD_ID', how='left')
-    if df_hous is not None: master_acs = master_acs.merge(df_hous, on='CD_ID', how='left')
-
-    return master_acs
-
-
 # ==========================================
 # 3. 核心：构建特定时间段的数据集
 # ==========================================
@@ -89,53 +35,46 @@ def build_period_dataset(period_name, rat_file, start_date, end_date, df_geo, df
 
     # 1. 处理老鼠 (直接读取对应时段的文件)
     if os.path.exists(rat_file):
-        df_rats = pd.read_csv(rat_file)
-        df_rats['CD_ID'] = df_rats['community_board'].apply(parse_id)
-        rat_stats = df_rats.groupby('CD_ID').size().reset_index(name='Rat_Complaints')
+        # 只用到社区编号 (行数即投诉数)，其余列不读
+        df_rats = pd.read_csv(rat_file, usecols=['community_board'], engine='pyarrow', dtype_backend='pyarrow')
+        df_rats['CD_ID'] = parse_id_by_unique(df_rats['community_board'])
+        rat_stats = df_rats.groupby('CD_ID', sort=False, observed=True).agg(Rat_Complaints=('CD_ID', 'size'))
     else:
         print(f"   ❌ 找不到老鼠文件: {rat_file}")
         return
 
-    # 2. 处理垃圾 (从总表中切分时间)
-    # 确保日期格式
-    df_trash_all['date_obj'] = pd.to_datetime(df_trash_all['month'], format='%Y / %m', errors='coerce')
-
-    # 切片
-    mask = (df_trash_all['date_obj'] >= start_date) & (df_trash_all['date_obj'] <= end_date)
-    df_trash_period = df_trash_all[mask].copy()
-
-    # 计算吨数
-    df_trash_period['Total_Tons'] = df_trash_period['refusetonscollected'].fillna(0) + \
-                                    df_trash_period['papertonscollected'].fillna(0) + \
-                                    df_trash_period['mgptonscollected'].fillna(0)
-
-    df_trash_period['CD_ID'] = df_trash_period['communitydistrict'].apply(parse_id)
-    trash_stats = df_trash_period.groupby('CD_ID')['Total_Tons'].mean().reset_index(name='Monthly_Trash_Tons')
+    # 2. 处理垃圾 (总表已按日期建索引、算好 Total_Tons 和 CD_ID，这里直接按时间切片)
+    df_trash_period = df_trash_all.loc[start_date:end_date]
+    trash_stats = df_trash_period.groupby('CD_ID', sort=False, observed=True).agg(Monthly_Trash_Tons=('Total_Tons', 'mean'))
 
     print(f"   - 老鼠数据行数 (聚合后): {len(rat_stats)}")
     print(f"   - 垃圾数据涵盖月份数: {df_trash_period['month'].nunique()}")
 
-    # 3. 合并
-    master = df_geo.merge(rat_stats, on='CD_ID', how='left')
-    master = master.merge(trash_stats, on='CD_ID', how='left')
+    # 3. 合并: 各表都以 CD_ID 为索引，一次 concat 对齐 (行以地图分区为准，相当于 left join)
+    parts = [df_geo.set_index('CD_ID'), rat_stats, trash_stats]
 
     # 4. 如果有 ACS 数据 (通常只给 Current 阶段用)
     if df_acs is not None:
-        master = master.merge(df_acs, on='CD_ID', how='left')
+        parts.append(df_acs.set_index('CD_ID'))
+    master = pd.concat(parts, axis=1).reindex(df_geo['CD_ID']).reset_index()
 
     # 5. 简单计算
     master = master.fillna(0)
     if 'Population' in master.columns and 'Housing_Units' in master.columns:
-        # 避免除以0
-        master['Trash_Per_Capita'] = master.apply(
-            lambda x: x['Monthly_Trash_Tons'] / x['Population'] if x['Population'] > 0 else 0, axis=1)
-        master['Rat_Density_Per_Unit'] = master.apply(
-            lambda x: x['Rat_Complaints'] / x['Housing_Units'] if x['Housing_Units'] > 0 else 0, axis=1)
+        # 避免除以0 (分母为 0 的行直接记 0)
+        pop = master['Population'].to_numpy(dtype=float)
+        hu = master['Housing_Units'].to_numpy(dtype=float)
+        tons = master['Monthly_Trash_Tons'].to_numpy(dtype=float)
+        rats = master['Rat_Complaints'].to_numpy(dtype=float)
+        master['Trash_Per_Capita'] = np.divide(tons, pop, out=np.zeros_like(tons), where=pop > 0)
+        master['Rat_Density_Per_Unit'] = np.divide(rats, hu, out=np.zeros_like(rats), where=hu > 0)
 
     # 保存
     filename = f"Manhattan_Data_{period_name}.csv"
     master.to_csv(filename, index=False)
-    print(f"   ✅ 已生成: {filename}")
+    # 同时写一份 Parquet 给下游求解脚本读 (CSV 留着方便人工查看)
+    master.to_parquet(filename.replace('.csv', '.parquet'), index=False)
+    print(f"   ✅ 已生成: {filename} (+ .parquet)")
 
 
 # ==========================================
@@ -143,8 +82,9 @@ def build_period_dataset(period_name, rat_file, start_date, end_date, df_geo, df
 # ==========================================
 
 # 加载公共资源
-df_geo_base = load_geo()
-df_trash_raw = pd.read_csv(FILE_TRASH_ALL)
+df_geo_base = load_geo(FILE_GEO)
+# 垃圾总表只清洗一次 (按月份建索引)，两个时段都用 .loc 切片
+df_trash_raw = get_trash_indexed()
 df_acs_base = load_acs_features()
 
 # --- 生成 Baseline (2017-2019) ---
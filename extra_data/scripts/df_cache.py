@@ -0,0 +1,40 @@
+import pandas as pd
+import hashlib
+import functools
+import os
+
+# 缓存目录: 项目根目录的 .cache (按本文件位置定位，与从哪个目录运行无关，和其它脚本共用)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".cache")
+
+
+def cache_df(fn):
+    """
+    把"读文件 -> DataFrame"的函数结果缓存成 Parquet。
+    约定被装饰函数的第一个参数是源文件路径；
+    缓存键 = 函数名 + 函数代码 + 路径 + 文件修改时间 + 其余参数，源文件或函数本身一改动缓存自动失效。
+    """
+    # 函数代码指纹: 字节码 + 常量 (列名等) + 引用的名字。嵌套函数的代码对象 repr 带内存地址，不计入;
+    # frozenset 常量的遍历顺序随进程的字符串哈希变化，先排序
+    code = fn.__code__
+    consts = tuple(sorted(map(repr, c)) if isinstance(c, frozenset) else c
+                   for c in code.co_consts if not hasattr(c, 'co_code'))
+    code_hash = hashlib.md5(code.co_code + repr((consts, code.co_names)).encode()).hexdigest()
+
+    @functools.wraps(fn)
+    def wrap(path, *a, **kw):
+        if not os.path.exists(path):
+            return fn(path, *a, **kw)
+
+        key = hashlib.md5(f'{fn.__qualname__}{code_hash}{path}{os.path.getmtime(path)}{a}{kw}'.encode()).hexdigest()
+        cache = os.path.join(CACHE_DIR, f'{key}.parquet')
+        if os.path.exists(cache):
+            print(f"   ⚡ 命中缓存: {os.path.basename(path)}")
+            return pd.read_parquet(cache)
+
+        df = fn(path, *a, **kw)
+        if df is not None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            df.to_parquet(cache)
+        return df
+
+    return wrap
@@ -1,6 +1,7 @@
 import pandas as pd
-import re
+import numpy as np
 import os
+from cd_utils import EXCEL_ENGINE, parse_id_vec
 
 # ==========================================
 # 1. 修正后的文件路径 (Strict Path Config)
@@ -10,20 +11,9 @@ FILE_BASELINE = "extra_data/merged_data/Manhattan_Data_Baseline_2017_2019.csv"
 FILE_CURRENT = "extra_data/merged_data/Manhattan_Data_Current_2023_2025.csv"
 FILE_HOUS = "extra_data/population_economy_data/Hous_1923_CDTA.xlsx"
 
-
 # ==========================================
 # 2. 核心工具
 # ==========================================
-def parse_id(val):
-    s = str(val).upper().strip()
-    nums = re.findall(r'\d+', s)
-    if not nums: return None
-    num = int(nums[-1])
-    if 101 <= num <= 112: return num
-    if 1 <= num <= 12: return 100 + num
-    return None
-
-
 def get_housing_data():
     print(f"🏠 正在从 {FILE_HOUS} 提取住房数据...")
 
@@ -33,33 +23,29 @@ def get_housing_data():
         return None
 
     try:
-        # 显式指定 engine='openpyxl'
-        df = pd.read_excel(FILE_HOUS, engine='openpyxl')
+        # 先只读表头，确定要用的列后再按 usecols 读取
+        header = pd.read_excel(FILE_HOUS, engine=EXCEL_ENGINE, nrows=0).columns
 
         # 1. 找 GeoID 列
-        geo_cols = [c for c in df.columns if 'geo' in str(c).lower() and 'id' in str(c).lower()]
+        geo_cols = [c for c in header if 'geo' in str(c).lower() and 'id' in str(c).lower()]
         if not geo_cols:
             print("❌ 未找到 GeoID 列")
             return None
         geo_col = geo_cols[0]
 
-        # 2. 筛选曼哈顿
-        df = df[df[geo_col].astype(str).str.startswith('MN')].copy()
-        df['CD_ID'] = df[geo_col].apply(parse_id)
-
-        # 3. 找住房单元列 (Total Housing Units)
+        # 2. 找住房单元列 (Total Housing Units)
         # 根据数据字典，Code是 HU1，Estimate 是 E -> 所以列名是 HU1E
         target_col = None
 
         # 优先找标准代码 'HU1E' (这是根据你字典确认的)
-        if 'HU1E' in df.columns:
+        if 'HU1E' in header:
             target_col = 'HU1E'
         # 备选：有时候可能是 HU1
-        elif 'HU1' in df.columns:
+        elif 'HU1' in header:
             target_col = 'HU1'
         # 再次备选：模糊搜索
         else:
-            for c in df.columns:
+            for c in header:
                 # 排除 'Occ' (Occupied), 找 'Total', 'Housing', 'Units'
                 c_lower = str(c).lower()
                 if 'hu' in c_lower and '1' in c_lower and 'e' in c_lower and 'occ' not in c_lower:
@@ -68,11 +54,15 @@ def get_housing_data():
 
         if target_col:
             print(f"   ✅ 锁定住房列: [{target_col}]")
+            # 3. 只读这两列，筛选曼哈顿
+            df = pd.read_excel(FILE_HOUS, engine=EXCEL_ENGINE, usecols=[geo_col, target_col])
+            df = df[df[geo_col].astype(str).str.startswith('MN')].copy()
+            df['CD_ID'] = parse_id_vec(df[geo_col])
             return df[['CD_ID', target_col]].rename(columns={target_col: 'Housing_Units'})
         else:
             print("   ❌ 未找到住房单元列 (HU1E)，请检查 Excel 内容。")
             # 调试：打印前10个列名看看
-            print(f"   前10个列名: {list(df.columns)[:10]}")
+            print(f"   前10个列名: {list(header)[:10]}")
             return None
 
     except Exception as e:
@@ -112,13 +102,14 @@ def update_dataset(csv_file, df_hous):
 
     # 2. 住房老鼠密度 (Rats / 1000 Units)
     if 'Rat_Complaints' in df.columns:
-        df['Rats_Per_1k_Units'] = df.apply(
-            lambda x: (x['Rat_Complaints'] / x['Housing_Units'] * 1000) if x['Housing_Units'] > 0 else 0,
-            axis=1
-        )
+        rats = df['Rat_Complaints'].to_numpy(dtype=float)
+        hu = df['Housing_Units'].to_numpy(dtype=float)
+        df['Rats_Per_1k_Units'] = np.divide(rats * 1000.0, hu, out=np.zeros_like(rats), where=hu > 0)
 
     # 覆盖保存
     df.to_csv(csv_file, index=False)
+    # 同步一份 Parquet 给下游求解脚本 (junheng.py 等) 直接读取
+    df.to_parquet(csv_file.replace('.csv', '.parquet'), index=False)
     print(f"   ✅ 更新完成！新增列: Housing_Units, Housing_Density, Rats_Per_1k_Units")
 
 
@@ -1,5 +1,5 @@
 import pandas as pd
-import urllib.parse
+from socrata import fetch_chunked
 
 # 1. 基础设置
 base_url = "https://data.cityofnewyork.us/resource/erm2-nwe9.csv"
@@ -11,14 +11,16 @@ where_clause = "borough='MANHATTAN' AND created_date >= '2017-01-01' AND created
 # 选取的列保持一致，方便后面合并
 select_clause = "unique_key, created_date, complaint_type, location_type, latitude, longitude, community_board"
 
-# 3. 拼接 URL
-query_url = f"{base_url}?$where={urllib.parse.quote(where_clause)}&$select={urllib.parse.quote(select_clause)}&$limit=200000"
+# Socrata 返回的时间戳格式 (例: 2019-12-31T23:59:59.000)，显式指定可跳过逐行推断
+SOCRATA_TS_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
 
+# 3. 分块并发抓取 (翻页与拼接统一放在 socrata.py)
 print("正在抓取 [2017-2019] 疫情前基准数据...")
 
 try:
-    df_old = pd.read_csv(query_url)
-    df_old['created_date'] = pd.to_datetime(df_old['created_date'])
+    # 分块并发下载, 每块交给 pyarrow 多线程解析
+    df_old = fetch_chunked(base_url, where_clause, select_clause)
+    df_old['created_date'] = pd.to_datetime(df_old['created_date'], format=SOCRATA_TS_FORMAT, cache=True)
 
     print("-" * 30)
     print(f"疫情前数据抓取成功！")
@@ -1,5 +1,5 @@
 import pandas as pd
-import urllib.parse
+from socrata import fetch_chunked
 
 # 1. 设置基础 URL
 base_url = "https://data.cityofnewyork.us/resource/erm2-nwe9.csv"
@@ -20,17 +20,18 @@ where_clause = "borough='MANHATTAN' AND created_date > '2023-01-01' AND complain
 # community_board: 用来和你的 DSNY 地图分区匹配 (关键!)
 select_clause = "unique_key, created_date, complaint_type, location_type, latitude, longitude, community_board"
 
-# 3. 拼接 URL (设置 limit 为 20万，管够)
-query_url = f"{base_url}?$where={urllib.parse.quote(where_clause)}&$select={urllib.parse.quote(select_clause)}&$limit=200000"
+# Socrata 返回的时间戳格式 (例: 2023-01-01T00:04:12.000)，显式指定可跳过逐行推断
+SOCRATA_TS_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
 
+# 3. 分块并发抓取 (翻页与拼接统一放在 socrata.py)
 print("正在通过 API 抓取曼哈顿 2023年至今的老鼠数据...")
 
 try:
-    # 读取数据
-    df_rats = pd.read_csv(query_url)
+    # 分块并发下载, 每块交给 pyarrow 多线程解析
+    df_rats = fetch_chunked(base_url, where_clause, select_clause)
 
     # 转换日期格式
-    df_rats['created_date'] = pd.to_datetime(df_rats['created_date'])
+    df_rats['created_date'] = pd.to_datetime(df_rats['created_date'], format=SOCRATA_TS_FORMAT, cache=True)
 
     print("-" * 30)
     print(f"数据抓取成功！")
@@ -0,0 +1,39 @@
+import pandas as pd
+import urllib.parse
+import urllib.request
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+# ==========================================
+# Socrata (NYC Open Data) 分块抓取 (rodent_2017_2019.py / rodent_2023_2025.py 共用)
+# ==========================================
+# 按 unique_key 排序后用 $limit/$offset 翻页，
+# 每轮并发 FETCH_WORKERS 个分块，某块不满 CHUNK_SIZE 行说明已到末尾
+CHUNK_SIZE = 50000
+FETCH_WORKERS = 4
+
+
+def fetch_chunk(base_url, where, select, offset):
+    """抓取 [offset, offset + CHUNK_SIZE) 这一块并解析为 DataFrame"""
+    query_url = (f"{base_url}?$where={urllib.parse.quote(where)}"
+                 f"&$select={urllib.parse.quote(select)}"
+                 f"&$order=unique_key&$limit={CHUNK_SIZE}&$offset={offset}")
+    with urllib.request.urlopen(query_url) as resp:
+        raw = resp.read()
+    return pd.read_csv(io.BytesIO(raw), engine='pyarrow')
+
+
+def fetch_chunked(base_url, where, select):
+    """并发翻页抓取全部结果，最后一次性拼接"""
+    out = []
+    offset = 0
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        while True:
+            offsets = [offset + i * CHUNK_SIZE for i in range(FETCH_WORKERS)]
+            chunks = list(pool.map(lambda o: fetch_chunk(base_url, where, select, o), offsets))
+            out.extend(c for c in chunks if not c.empty)
+            print(f"   已抓取 {sum(len(c) for c in out)} 行...")
+            if len(chunks[-1]) < CHUNK_SIZE:
+                break
+            offset += FETCH_WORKERS * CHUNK_SIZE
+    return pd.concat(out, ignore_index=True) if out else pd.DataFrame()
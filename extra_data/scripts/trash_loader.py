@@ -0,0 +1,35 @@
+import pandas as pd
+import numpy as np
+import functools
+from df_cache import cache_df
+from cd_utils import parse_id_by_unique
+
+# ==========================================
+# 垃圾吨数总表加载 (data_merge.py / merge_2017_2019.py 共用)
+# ==========================================
+# 请确保脚本是在项目根目录下运行的
+FILE_TRASH_ALL = "extra_data/garbage_data/Manhattan_Garbage_Ton_201701_202510.csv"  # 包含 2017-2025 的总表
+# 三类垃圾吨数列 (缺失按 0 计)，Total_Tons = 三列之和
+TONS_COLS = ['refusetonscollected', 'papertonscollected', 'mgptonscollected']
+
+
+@cache_df
+def _load_trash(path):
+    """读总表并做完清洗: 日期解析、Total_Tons、CD_ID，按月份建有序 DatetimeIndex"""
+    df = pd.read_csv(path, usecols=['month', 'communitydistrict', *TONS_COLS],
+                     engine='pyarrow', dtype_backend='pyarrow')
+    df['date'] = pd.to_datetime(df['month'], format='%Y / %m', errors='coerce', cache=True)
+    df = df.dropna(subset=['date'])
+    df['Total_Tons'] = df[TONS_COLS].to_numpy(dtype=np.float64, na_value=0.0).sum(axis=1)
+    df['CD_ID'] = parse_id_by_unique(df['communitydistrict'])
+    return df.set_index('date').sort_index()
+
+
+@functools.lru_cache(maxsize=1)
+def get_trash_indexed(path=FILE_TRASH_ALL):
+    """
+    清洗好的垃圾总表 (索引为月份)，各时段直接 .loc[start:end] 切片。
+    同一进程内只处理一次 (lru_cache)；跨进程复用靠 _load_trash 的 Parquet 缓存。
+    注意返回的是共享对象，调用方不要原地修改。
+    """
+    return _load_trash(path)
@@ -0,0 +1,12 @@
+# ==========================================
+# Numba 可选 (topology.py / problem1_solve.py / junheng.py / problem1_visualization2.py / try/solve1.py 共用):
+# 装了就 JIT 编译热点内核，没装就按普通 Python 跑 (prange 退回 range)
+# ==========================================
+try:
+    from numba import njit, prange
+except ImportError:
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]): return args[0]
+        return lambda f: f
@@ -4,11 +4,12 @@ import os
 import math
 import itertools
 import random
-import networkx as nx
 import matplotlib.pyplot as plt
+from topology import NODE_INDEX, ADJ_BITMASK, _popcount, component
+from _jit import njit
 
 # ================= 1. 核心配置与数据结构 =================
-DATA_PATH = os.path.join('..', 'extra_data', 'merged_data', 'Manhattan_Data_Current_2023_2025.csv')
+DATA_PATH = os.path.join('..', 'extra_data', 'merged_data', 'Manhattan_Data_Current_2023_2025.parquet')
 
 # 车辆参数
 TRUCK_CAPACITY = 12.0 * 0.9  
@@ -20,105 +21,111 @@ W_TRUCKS = 5000.0
 W_VAR_DEFAULT = 50.0  # 默认的均衡权重
 W_COHESION = 300.0   
 
-# 拓扑结构
-REAL_TOPOLOGY = {
-    'MN01': ['MN02', 'MN03'],
-    'MN02': ['MN01', 'MN03', 'MN04'],
-    'MN03': ['MN01', 'MN02', 'MN06'],
-    'MN04': ['MN02', 'MN05', 'MN07'],
-    'MN05': ['MN04', 'MN06', 'MN07'],
-    'MN06': ['MN03', 'MN05', 'MN08'],
-    'MN07': ['MN04', 'MN05', 'MN08', 'MN09'],
-    'MN08': ['MN06', 'MN07', 'MN11'],
-    'MN09': ['MN07', 'MN10', 'MN12'],
-    'MN10': ['MN09', 'MN11', 'MN12'],
-    'MN11': ['MN08', 'MN10', 'MN12'],
-    'MN12': ['MN09', 'MN10', 'MN11']
-}
-G = nx.Graph(REAL_TOPOLOGY)
-
 # 全局变量，用于动态修改权重
 CURRENT_W_VAR = W_VAR_DEFAULT
 
 # ================= 2. 求解器核心函数 =================
 
 def load_data(filepath):
-    if not os.path.exists(filepath): 
+    # 优先读 Parquet (merge_house.py 生成)，没有就退回同名 CSV
+    csv_path = os.path.splitext(filepath)[0] + '.csv'
+    if os.path.exists(filepath):
+        df = pd.read_parquet(filepath)
+    elif os.path.exists(csv_path):
+        df = pd.read_csv(csv_path)
+    else:
         # Mock data for testing without file
         return [{'id': f'MN{i:02d}', 'daily_tons': 15.0+i, 'rats': 100+i*10, 'is_high_risk': i%2==0} for i in range(1,13)]
 
-    df = pd.read_csv(filepath)
-    districts = []
-    rat_threshold = df['Rat_Complaints'].quantile(0.70)
-    
-    for _, row in df.iterrows():
-        cd_id = int(row['CD_ID']) if 'CD_ID' in row else int(row.name)
-        name = f"MN{cd_id % 100:02d}"
-        daily_tons = row['Monthly_Trash_Tons'] / 30.0
-        rat_count = row['Rat_Complaints']
-        districts.append({
-            'id': name,
-            'daily_tons': daily_tons,
-            'rats': rat_count,
-            'is_high_risk': (rat_count >= rat_threshold)
-        })
-    return districts
+    rats = df['Rat_Complaints'].to_numpy()
+    rat_threshold = df['Rat_Complaints'].quantile(0.70) # 前30%为高风险
+    is_high_risk = rats >= rat_threshold
+
+    # 整列计算，不逐行 iterrows
+    cd_ids = (df['CD_ID'] if 'CD_ID' in df else df.index).to_numpy().astype(int)
+    names = [f"MN{c % 100:02d}" for c in cd_ids]
+    daily_tons = df['Monthly_Trash_Tons'].to_numpy() / 30.0 # 月度 -> 日均
+
+    return [{'id': n, 'daily_tons': t, 'rats': r, 'is_high_risk': h}
+            for n, t, r, h in zip(names, daily_tons, rats, is_high_risk)]
+
+def _max_gap(p):
+    """循环一周内相邻两次收运的最大间隔天数 (全 0 模式记为 7)"""
+    days = np.flatnonzero(p)
+    if len(days) == 0: return 7
+    return int(np.diff(np.append(days, days[0] + 7)).max())
+
+# 全部 128 种周排班模式只枚举一次，频次 / 最大间隔也一并预计算
+ALL_PATTERNS = np.array(list(itertools.product([0, 1], repeat=7)))
+PATTERN_FREQ = ALL_PATTERNS.sum(axis=1)
+PATTERN_MAX_GAP = np.array([_max_gap(p) for p in ALL_PATTERNS])
 
 def get_valid_patterns(district):
     daily_tons = district['daily_tons']
     must_be_frequent = district['is_high_risk']
-    valid_patterns = []
-    
-    for p in itertools.product([0, 1], repeat=7):
-        freq = sum(p)
-        if freq not in [2, 3]: continue
-        if must_be_frequent and freq < 3: continue
-            
-        pickup_days = [i for i, x in enumerate(p) if x == 1]
-        gaps = [pickup_days[i+1]-pickup_days[i] for i in range(len(pickup_days)-1)]
-        gaps.append((7 - pickup_days[-1]) + pickup_days[0])
-        max_gap = max(gaps)
-        
-        if max_gap > MAX_GAP_DAYS: continue
-        if (max_gap * daily_tons) > STREET_CAPACITY_TONS: continue 
-            
-        valid_patterns.append(np.array(p))
-    
-    if not valid_patterns: valid_patterns.append(np.array([1,0,1,0,1,0,0]))
-    return valid_patterns
 
-def calculate_trucks_with_topology(day_active_districts, district_map):
-    if not day_active_districts: return 0
-    subgraph = G.subgraph(day_active_districts)
-    components = list(nx.connected_components(subgraph))
-    total_trucks = 0
-    for component in components:
-        load = sum(district_map[node]['load_today'] for node in component)
-        total_trucks += math.ceil(load / TRUCK_CAPACITY)
-    return total_trucks
+    mask = (PATTERN_FREQ >= 2) & (PATTERN_FREQ <= 3)
+    if must_be_frequent: mask &= PATTERN_FREQ >= 3
+    mask &= PATTERN_MAX_GAP <= MAX_GAP_DAYS
+    mask &= (PATTERN_MAX_GAP * daily_tons) <= STREET_CAPACITY_TONS
 
-def evaluate_solution(districts, indices):
-    d_map = {d['id']: d for d in districts}
+    valid_patterns = ALL_PATTERNS[mask]
+    if len(valid_patterns) == 0: valid_patterns = np.array([[1,0,1,0,1,0,0]])
+    return valid_patterns
+
+@njit(cache=True)
+def calculate_trucks_with_topology(patterns, daily_tons, node_idx, adj_bits, capacity):
+    """
+    每天: 当天收运的区按拓扑拆成连通块 (topology.component)，每块合车，车数 = ceil(块内总量 / 单车容量)
+    patterns: (n, 7) 各区当前模式; node_idx: 各区在 adj_bits 中的位置
+    """
+    n = patterns.shape[0]
+    loads = np.zeros(adj_bits.shape[0])
     daily_trucks = np.zeros(7)
-    total_cohesion_score = 0
-    
-    for i, d in enumerate(districts):
-        pat = d['patterns'][indices[i]]
-        d['current_pattern'] = pat
-        d['pickup_load'] = d['daily_tons'] * 7.0 / sum(pat)
-        
     for day in range(7):
-        active_nodes = []
-        for d in districts:
-            if d['current_pattern'][day] == 1:
-                active_nodes.append(d['id'])
-                d_map[d['id']]['load_today'] = d['pickup_load']
-        
-        daily_trucks[day] = calculate_trucks_with_topology(active_nodes, d_map)
-        
-        if len(active_nodes) > 1:
-            subgraph = G.subgraph(active_nodes)
-            total_cohesion_score += subgraph.number_of_edges()
+        active = 0
+        for i in range(n):
+            if patterns[i, day] == 1:
+                active |= 1 << node_idx[i]
+                loads[node_idx[i]] = daily_tons[i] * 7.0 / patterns[i].sum()
+
+        remaining = active
+        trucks = 0
+        while remaining:
+            # 从最低位的区出发扩展出整个连通块
+            comp = component(remaining & -remaining, active, adj_bits)
+            load = 0.0
+            for node in range(adj_bits.shape[0]):
+                if (comp >> node) & 1: load += loads[node]
+            trucks += math.ceil(load / capacity)
+            remaining &= ~comp
+        daily_trucks[day] = trucks
+    return daily_trucks
+
+@njit(cache=True)
+def cohesion_score(patterns, node_idx, adj_bits):
+    """一周内每天"同日收运且相邻"的区对数之和 (= 当天活跃子图的边数)"""
+    n = patterns.shape[0]
+    total = 0
+    for day in range(7):
+        active = 0
+        for i in range(n):
+            if patterns[i, day] == 1: active |= 1 << node_idx[i]
+        # 每条边在两个端点各数一次
+        edges2 = 0
+        for i in range(n):
+            if patterns[i, day] == 1: edges2 += _popcount(adj_bits[node_idx[i]] & active)
+        total += edges2 // 2
+    return total
+
+def evaluate_solution(districts, indices):
+    patterns = np.array([d['patterns'][indices[i]] for i, d in enumerate(districts)])
+    daily_tons = np.array([d['daily_tons'] for d in districts], dtype=np.float64)
+    node_idx = np.array([NODE_INDEX[d['id']] for d in districts], dtype=np.int64)
+
+    daily_trucks = calculate_trucks_with_topology(patterns, daily_tons, node_idx, ADJ_BITMASK, TRUCK_CAPACITY)
+
+    total_cohesion_score = cohesion_score(patterns, node_idx, ADJ_BITMASK)
             
     max_trucks = np.max(daily_trucks)
     var_trucks = np.var(daily_trucks)
@@ -127,12 +134,15 @@ def evaluate_solution(districts, indices):
     cost = (W_TRUCKS * max_trucks) + (CURRENT_W_VAR * var_trucks) - (W_COHESION * total_cohesion_score)
     return cost, daily_trucks
 
-def solve_sa(districts):
+def solve_sa(districts, rng):
+    """rng: 调用方传入的 random.Random 实例 (不碰模块级全局随机状态)"""
     # 预处理模式
     for d in districts:
         if 'patterns' not in d: d['patterns'] = get_valid_patterns(d)
 
-    current_idx = [random.randint(0, len(d['patterns'])-1) for d in districts]
+    current_idx = [rng.randint(0, len(d['patterns'])-1) for d in districts]
+    # 只有一个候选模式的区没法扰动，预先挑出"可动"的区，退火时只在其中抽
+    movable = [i for i, d in enumerate(districts) if len(d['patterns']) > 1]
     curr_cost, _ = evaluate_solution(districts, current_idx)
     best_cost = curr_cost
     best_idx = list(current_idx)
@@ -140,18 +150,18 @@ def solve_sa(districts):
     # 快速退火配置 (为了实验跑得快一点，步数设少一点，但足以看出趋势)
     T = 2000.0
     alpha = 0.98
+    if not movable: return districts, best_idx
     
     while T > 0.5:
-        idx = random.randint(0, len(districts)-1)
-        if len(districts[idx]['patterns']) <= 1: continue
+        idx = movable[rng.randint(0, len(movable)-1)]
         
         old_val = current_idx[idx]
-        new_val = random.randint(0, len(districts[idx]['patterns'])-1)
+        new_val = rng.randint(0, len(districts[idx]['patterns'])-1)
         
         current_idx[idx] = new_val
         new_cost, _ = evaluate_solution(districts, current_idx)
         
-        if new_cost < curr_cost or random.random() < math.exp(-(new_cost-curr_cost)/T):
+        if new_cost < curr_cost or rng.random() < math.exp(-(new_cost-curr_cost)/T):
             curr_cost = new_cost
             if curr_cost < best_cost:
                 best_cost = curr_cost
@@ -163,7 +173,7 @@ def solve_sa(districts):
 
 # ================= 3. 实验逻辑 =================
 
-def run_experiment(w_var_value, strategy_name):
+def run_experiment(w_var_value, strategy_name, rng):
     global CURRENT_W_VAR
     CURRENT_W_VAR = w_var_value # 修改全局权重
     
@@ -173,7 +183,7 @@ def run_experiment(w_var_value, strategy_name):
     data = load_data(DATA_PATH)
     
     # 运行求解器
-    districts, indices = solve_sa(data)
+    districts, indices = solve_sa(data, rng)
     
     # 评估结果
     cost, daily_trucks = evaluate_solution(districts, indices)
@@ -184,19 +194,19 @@ def run_experiment(w_var_value, strategy_name):
     return daily_trucks, max_trucks, total_truck_days
 
 if __name__ == "__main__":
-    # 设置随机种子以便复现
-    random.seed(42)
+    # 设置随机种子以便复现 (三组实验共用同一个随机数流)
+    rng = random.Random(42)
     np.random.seed(42)
     
     # 1. 运行三组对比实验
     # 方案 A: 你的当前方案 (追求均衡)
-    d1, max1, tot1 = run_experiment(50.0, "Balanced (Proposed)")
+    d1, max1, tot1 = run_experiment(50.0, "Balanced (Proposed)", rng)
     
     # 方案 B: 完全不管均衡 (只管拓扑拼车和总数)
-    d2, max2, tot2 = run_experiment(0.0, "Unbalanced (No Penalty)")
+    d2, max2, tot2 = run_experiment(0.0, "Unbalanced (No Penalty)", rng)
     
     # 方案 C: 故意制造拥堵 (负权重)
-    d3, max3, tot3 = run_experiment(-100.0, "Anti-Balanced (Chaos)")
+    d3, max3, tot3 = run_experiment(-100.0, "Anti-Balanced (Chaos)", rng)
     
     # 2. 打印详细对比表
     print("\n" + "="*80)
@@ -0,0 +1,63 @@
+import functools
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from plot_cache import CACHE_DIR
+
+# ==========================================
+# 曼哈顿分区几何 (绘图4.py / 绘图4_3.py 共用，路径相对项目根目录)
+# parse_wkt 另供 tuobu.py / problem1_visualization2.py / problem1_visualization3.py 解析 WKT 列
+# ==========================================
+MAP_FILE = './raw_data/DSNY_Districts_20251130.csv'
+# 筛 MN + 解析 WKT 后的 GeoParquet 缓存 (含中心点坐标列)
+MAP_CACHE = os.path.join(CACHE_DIR, 'mn_districts.parquet')
+
+
+def parse_wkt(s):
+    """整列 WKT 一次性交给 GEOS 解析 (向量化)，空值和坏的 WKT 都记为 None"""
+    return shapely.from_wkt(s.where(s.notna(), None).to_numpy(), on_invalid='ignore')
+
+
+def district_ids(cd):
+    """社区编号统一成 DISTRICT 格式 (101 -> MN01)，整列计算; 转不成数字的 ID 原样保留"""
+    num = pd.to_numeric(cd, errors='coerce')
+    ids = 'MN' + (np.trunc(num) % 100).astype('Int64').astype(str).str.zfill(2)
+    return ids.where(num.notna(), cd.astype(str))
+
+
+def plot_by_category(gdf, col, colors, ax, **kw):
+    """
+    按 col 分类上色，所有类别一次画完 (一个 PatchCollection)。
+    按 colors (类别 -> 颜色) 的顺序稳定排序，叠放次序和逐类画时一样; col 不在 colors 里 (含缺失) 的区不画
+    """
+    rank = gdf[col].map({label: i for i, label in enumerate(colors)})
+    rows = gdf.iloc[np.argsort(rank.to_numpy(), kind='stable')[:rank.notna().sum()]]
+    if not rows.empty:
+        rows.plot(ax=ax, color=rows[col].map(colors).to_numpy(), **kw)
+
+
+@functools.lru_cache(maxsize=1)
+def get_manhattan_gdf():
+    """
+    曼哈顿分区几何 (DISTRICT + geometry + 中心点 cent_x / cent_y)。
+    中心点解析时算一次一起存进缓存，标注直接读这两列; 沿用经纬度上的平面中心点，和之前出的图位置一致。
+    地图文件没更新就直接读 GeoParquet 缓存; 同一进程里再调用直接返回内存里的同一个对象，调用方不要原地修改
+    """
+    if os.path.exists(MAP_CACHE) and os.path.getmtime(MAP_CACHE) >= os.path.getmtime(MAP_FILE):
+        gdf_map = gpd.read_parquet(MAP_CACHE)
+        # 早先的缓存没有中心点列，这种就按地图文件重建
+        if {'cent_x', 'cent_y'} <= set(gdf_map.columns):
+            return gdf_map
+    df_map = pd.read_csv(MAP_FILE, usecols=['DISTRICT', 'multipolygon'], engine='pyarrow')
+    # 先筛选曼哈顿 (MN开头)，再只解析这些行的 WKT
+    df_map = df_map[df_map['DISTRICT'].str.startswith('MN', na=False)].copy()
+    df_map['geometry'] = parse_wkt(df_map['multipolygon'])
+    gdf_map = gpd.GeoDataFrame(df_map.dropna(subset=['geometry']), geometry='geometry')
+    cent = gdf_map.geometry.centroid
+    gdf_map['cent_x'], gdf_map['cent_y'] = cent.x, cent.y
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    gdf_map.to_parquet(MAP_CACHE)
+    return gdf_map
@@ -0,0 +1,49 @@
+import hashlib
+import os
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+# ==========================================
+# 缓存判断与出图记录 (problem1_visualization2.py / problem1_visualization3.py / problem2.py 共用;
+# CACHE_DIR 另供 mn_map.py / tuobu.py 使用)
+# ==========================================
+# 缓存文件和出图记录 (数据哈希) 都放项目根目录的 .cache (按本文件位置定位，与从哪个目录运行无关)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+
+
+def cache_is_fresh(cache, sources):
+    """缓存存在、源文件都在且缓存不比任何一个源文件旧 -> 可以直接用"""
+    if not os.path.exists(cache) or not all(os.path.exists(p) for p in sources):
+        return False
+    return os.path.getmtime(cache) >= max(os.path.getmtime(p) for p in sources)
+
+
+def data_key(*frames):
+    """输入数据的内容哈希: 几何列按 WKB，其余列按 CSV 文本"""
+    h = hashlib.sha256()
+    for df in frames:
+        if isinstance(df, gpd.GeoDataFrame):
+            h.update(b''.join(w or b'' for w in shapely.to_wkb(df.geometry.to_numpy())))
+            df = pd.DataFrame(df.drop(columns=df.geometry.name))
+        h.update(df.to_csv(index=False).encode())
+    return h.hexdigest()[:16]
+
+
+def is_up_to_date(out, key, force=False):
+    """输出图已存在且上次出图用的数据哈希与这次相同 -> 不用重画; force=True 时总是重画"""
+    stamp = os.path.join(CACHE_DIR, out + '.key')
+    if force or not os.path.exists(out) or not os.path.exists(stamp):
+        return False
+    with open(stamp) as f:
+        same = f.read() == key
+    if same: print(f"⏭️ 数据未变，跳过: {out}")
+    return same
+
+
+def mark_drawn(out, key):
+    """记下这张图对应的数据哈希"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(os.path.join(CACHE_DIR, out + '.key'), 'w') as f:
+        f.write(key)
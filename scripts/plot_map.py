@@ -1,19 +1,25 @@
 import pandas as pd
 import geopandas as gpd
-from shapely import wkt
+import shapely
 import matplotlib.pyplot as plt
 import os
 
-def safe_wkt_load(wkt_string):
-    """
-    尝试解析 WKT 字符串。
-    如果成功，返回几何对象；
-    如果失败（比如没闭合），返回 None。
-    """
-    try:
-        return wkt.loads(wkt_string)
-    except Exception:
-        return None
+# pyogrio 可选: 装了就让 GDAL 直接把 WKT 列读成几何，没装就退回 pandas + shapely 向量化解析
+try:
+    import pyogrio
+except ImportError:
+    pyogrio = None
+
+def read_districts(csv_file_path):
+    """读取曼哈顿 (MN 开头) 分区为 GeoDataFrame (DISTRICT + geometry)，损坏的几何记为 None。
+    先按区名筛行再解析 WKT，其他行政区的多边形不用解析"""
+    if pyogrio is not None:
+        return pyogrio.read_dataframe(csv_file_path, columns=['DISTRICT'], use_arrow=True, where="DISTRICT LIKE 'MN%'",
+                                      GEOM_POSSIBLE_NAMES='multipolygon', KEEP_GEOM_COLUMNS='NO')
+    df = pd.read_csv(csv_file_path, usecols=['DISTRICT', 'multipolygon'], engine='pyarrow')
+    df = df[df['DISTRICT'].str.startswith('MN', na=False)]
+    geoms = gpd.GeoSeries.from_wkt(df['multipolygon'], on_invalid='ignore')
+    return gpd.GeoDataFrame(df[['DISTRICT']], geometry=geoms)
 
 def draw_manhattan_map_robust():
     csv_file_path = './raw_data/DSNY_Districts_20251130.csv' # 请确保路径正确
@@ -24,18 +30,15 @@ def draw_manhattan_map_robust():
         print("❌ 文件不存在")
         return
 
-    # 1. 读取数据
-    df = pd.read_csv(csv_file_path, usecols=['DISTRICT', 'multipolygon'])
+    # 1. 读取数据 (读入时已完成容错解析)
+    df = read_districts(csv_file_path)
     
     # 2. 筛选曼哈顿 (带空值保护)
     df_mn = df[df['DISTRICT'].str.startswith('MN', na=False)].copy()
     print(f"🔍 找到 {len(df_mn)} 个曼哈顿分区行。")
 
-    # 3. 【关键修改】容错解析
-    print("⚙️ 正在解析几何数据 (自动跳过损坏行)...")
-    
-    # 对每一行尝试解析，坏的变成 None
-    df_mn['geometry'] = df_mn['multipolygon'].apply(safe_wkt_load)
+    # 3. 【关键修改】容错检查: 坏的几何 (比如没闭合) 在读取时已变成 None
+    print("⚙️ 正在检查几何数据 (自动跳过损坏行)...")
     
     # 分离出成功和失败的
     valid_districts = df_mn[df_mn['geometry'].notna()]
@@ -58,15 +61,13 @@ def draw_manhattan_map_robust():
     fig, ax = plt.subplots(figsize=(10, 12))
     gdf.plot(ax=ax, color='#ADD8E6', edgecolor='black', alpha=0.8)
 
-    # 标注名字
-    for idx, row in gdf.iterrows():
-        try:
-            centroid = row['geometry'].centroid
-            ax.annotate(text=row['DISTRICT'], 
-                        xy=(centroid.x, centroid.y), 
-                        ha='center', fontsize=9, fontweight='bold', color='darkred')
-        except:
-            pass # 如果算不出中心点就不标了
+    # 标注名字 (中心点整列向量化计算)
+    centroids = shapely.centroid(gdf['geometry'].to_numpy())
+    for name, x, y in zip(gdf['DISTRICT'], shapely.get_x(centroids), shapely.get_y(centroids)):
+        if pd.isna(x) or pd.isna(y): continue # 如果算不出中心点就不标了
+        ax.annotate(text=name, 
+                    xy=(x, y), 
+                    ha='center', fontsize=9, fontweight='bold', color='darkred')
 
     plt.title(f"Manhattan Districts ({len(valid_districts)}/{len(df_mn)} Visible)", fontsize=15)
     plt.axis('off')
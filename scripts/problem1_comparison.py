@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 import os
+import csv
 import math
 import matplotlib.pyplot as plt
 
@@ -16,14 +17,11 @@ STREET_CAPACITY_TONS = 600.0 # 物理容量死线 (与 v11 保持一致)
 
 def load_data(filepath):
     if not os.path.exists(filepath): raise FileNotFoundError(f"Missing: {filepath}")
-    df = pd.read_csv(filepath)
-    districts = []
-    for _, row in df.iterrows():
-        cd_id = int(row['CD_ID'])
-        name = f"MN{cd_id % 100:02d}"
-        daily = row['Monthly_Trash_Tons'] / 30.0
-        districts.append({'id': name, 'daily': daily})
-    return districts
+    df = pd.read_csv(filepath, usecols=['CD_ID', 'Monthly_Trash_Tons'])
+    # 整列计算，不逐行 iterrows
+    names = 'MN' + (df['CD_ID'].astype(int) % 100).astype(str).str.zfill(2)
+    daily = df['Monthly_Trash_Tons'] / 30.0
+    return [{'id': n, 'daily': d} for n, d in zip(names, daily)]
 
 def calculate_dedicated_fleet(districts):
     """
@@ -71,16 +69,21 @@ def get_shared_fleet_peak(optimized_csv_path):
         print("[Error] 找不到优化结果，请先运行 v11 脚本！")
         return 0, []
         
-    df = pd.read_csv(optimized_csv_path, index_col=0)
-    
-    # 提取最后一行 Total_Trucks (除去最后一列 Frequency)
-    if 'Total_Trucks' not in df.index:
+    # 只需要 Total_Trucks 这一行的 7 个数，用 csv 逐行扫，不必整表读进 DataFrame
+    days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    with open(optimized_csv_path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        day_cols = [header.index(d) for d in days]
+        # 第一列是行名，找 Total_Trucks 行 (除去最后一列 Frequency)
+        row = next((r for r in reader if r and r[0] == 'Total_Trucks'), None)
+
+    if row is None:
         print("[Error] CSV 中缺少 Total_Trucks 行")
         return 0, []
-        
+
     # 获取 Mon-Sun 的数据
-    days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-    daily_loads = df.loc['Total_Trucks', days].values.astype(int)
+    daily_loads = np.array([int(float(row[i])) for i in day_cols])
     
     # 共享模式下的车队规模 = 这一周里最忙那一天的车数
     # (因为车是共享的，只要满足峰值即可)
@@ -3,8 +3,8 @@ import numpy as np
 import os
 import math
 import itertools
-import random
-import networkx as nx 
+from topology import NODE_INDEX, N_NODES, ADJ_BITMASK, _popcount, component
+from _jit import njit, prange
 
 # ================= 1. 核心配置 =================
 DATA_PATH = os.path.join('..', 'extra_data', 'merged_data', 'Manhattan_Data_Current_2023_2025.csv')
@@ -23,23 +23,22 @@ W_TRUCKS = 5000.0    # [最重要] 极力压低最大车队数 (CapEx)
 W_VAR = 50.0         # 压低每日波动 (OpEx)
 W_COHESION = 300.0   # [复活的关键] 奖励邻居同一天工作，引导"拼车"机会
 
-# === 真实的曼哈顿拓扑结构 ===
-REAL_TOPOLOGY = {
-    'MN01': ['MN02', 'MN03'],
-    'MN02': ['MN01', 'MN03', 'MN04'],
-    'MN03': ['MN01', 'MN02', 'MN06'],
-    'MN04': ['MN02', 'MN05', 'MN07'],
-    'MN05': ['MN04', 'MN06', 'MN07'],
-    'MN06': ['MN03', 'MN05', 'MN08'],
-    'MN07': ['MN04', 'MN05', 'MN08', 'MN09'],
-    'MN08': ['MN06', 'MN07', 'MN11'],
-    'MN09': ['MN07', 'MN10', 'MN12'],
-    'MN10': ['MN09', 'MN11', 'MN12'],
-    'MN11': ['MN08', 'MN10', 'MN12'],
-    'MN12': ['MN09', 'MN10', 'MN11']
-}
-# 构建图对象，用于计算连通分量
-G = nx.Graph(REAL_TOPOLOGY)
+# === 模拟退火参数 ===
+SA_T0 = 3000.0       # 初始温度
+SA_T_MIN = 0.1       # 终止温度
+SA_ALPHA = 0.99      # 降温系数
+SA_CHAINS = 8         # 独立退火链条数 (固定条数保证结果可复现，prange 把各链分到现有核上，取最优)
+SA_SEED = 42         # 第 k 条链的种子为 SA_SEED + k
+# 自适应: 最优解连续 SA_REHEAT_AFTER 步没改进就回温到 SA_T_REHEAT 跳出局部最优，
+# 连续 SA_STOP_AFTER 步没改进就提前结束；接受率高于 SA_TARGET_ACCEPT 时降温加倍
+SA_REHEAT_AFTER = 200
+SA_T_REHEAT = 500.0
+SA_STOP_AFTER = 1000
+SA_TARGET_ACCEPT = 0.3
+SA_ACCEPT_WINDOW = 50
+
+# === 真实的曼哈顿拓扑结构 (见 topology.py) ===
+# 连通分量 / 内聚边数都用邻接位掩码 ADJ_BITMASK 做位运算，不再每步构造 networkx 子图
 
 # ================= 2. 数据加载与预处理 =================
 
@@ -50,175 +49,326 @@ def load_data(filepath):
         return _generate_mock_data()
 
     df = pd.read_csv(filepath)
-    districts = []
-    
+
     # [cite: 101] 鼠患分析：如果投诉量高，必须高频清运
+    rats = df['Rat_Complaints'].to_numpy()
     rat_threshold = df['Rat_Complaints'].quantile(0.70) # 前30%为高风险
-    
-    for _, row in df.iterrows():
-        cd_id = int(row['CD_ID']) if 'CD_ID' in row else int(row.name)
-        name = f"MN{cd_id % 100:02d}"
-        
-        # 将月度数据转换为日均数据 [cite: 72]
-        daily_tons = row['Monthly_Trash_Tons'] / 30.0
-        rat_count = row['Rat_Complaints']
-        
-        # 判定风险等级
-        is_high_risk = (rat_count >= rat_threshold)
-        
-        districts.append({
-            'id': name,
-            'daily_tons': daily_tons,
-            'rats': rat_count,
-            'is_high_risk': is_high_risk
-        })
-    return districts
+    is_high_risk = rats >= rat_threshold
+
+    # 整列计算，不逐行 iterrows
+    cd_ids = (df['CD_ID'] if 'CD_ID' in df else df.index).to_numpy().astype(int)
+    names = [f"MN{c % 100:02d}" for c in cd_ids]
+    # 将月度数据转换为日均数据 [cite: 72]
+    daily_tons = df['Monthly_Trash_Tons'].to_numpy() / 30.0
+
+    return _to_districts(names, daily_tons, rats, is_high_risk)
 
 def _generate_mock_data():
     """生成测试数据"""
-    return [{'id': f'MN{i:02d}', 'daily_tons': 15.0 + i, 'rats': 100+i*10, 'is_high_risk': i%2==0} for i in range(1,13)]
+    i = np.arange(1, 13)
+    return _to_districts([f'MN{k:02d}' for k in i], 15.0 + i, 100 + i*10, i % 2 == 0)
 
-def get_valid_patterns(district):
-    """基于风险和物理约束，生成合法的排班模式"""
-    daily_tons = district['daily_tons']
-    must_be_frequent = district['is_high_risk']
-    
-    valid_patterns = []
-    
-    # 遍历 7 天的所有 0/1 组合
-    for p in itertools.product([0, 1], repeat=7):
-        freq = sum(p)
-        
-        # [cite: 90] 频率只能是 2 或 3
-        if freq not in [2, 3]: continue
-            
-        # [cite: 101] 鼠患约束：高风险区必须 >= 3次
-        if must_be_frequent and freq < 3: continue
-            
-        # 间隔计算
-        pickup_days = [i for i, x in enumerate(p) if x == 1]
-        gaps = []
-        for i in range(len(pickup_days) - 1):
-            gaps.append(pickup_days[i+1] - pickup_days[i])
-        gaps.append((7 - pickup_days[-1]) + pickup_days[0])
-        max_gap = max(gaps)
-        
-        # 卫生与物理爆仓死线
-        if max_gap > MAX_GAP_DAYS: continue
-        if (max_gap * daily_tons) > STREET_CAPACITY_TONS: continue 
-            
-        valid_patterns.append(np.array(p))
-    
+def _to_districts(names, daily_tons, rats, is_high_risk):
+    """
+    districts 用"并行数组"存 (SoA)：每个字段一列 NumPy 数组，第 i 个元素都对应同一个区。
+    node_idx 是该区在拓扑 (NODE_INDEX) 中的下标，只在这里查一次
+    """
+    return {
+        'id': np.array(names),
+        'daily_tons': np.asarray(daily_tons, dtype=np.float64),
+        'rats': np.asarray(rats),
+        'is_high_risk': np.asarray(is_high_risk, dtype=bool),
+        'node_idx': np.array([NODE_INDEX[n] for n in names], dtype=np.int64),
+    }
+
+def _max_gap(p):
+    """循环一周内相邻两次收运的最大间隔天数 (全 0 模式记为 7)"""
+    pickup_days = np.flatnonzero(p)
+    if len(pickup_days) == 0: return 7
+    return int(np.diff(np.append(pickup_days, pickup_days[0] + 7)).max())
+
+# 7 天的所有 0/1 组合只枚举一次 (int8 表)，频次 / 最大间隔也一并预计算
+ALL_PATTERNS = np.array(list(itertools.product([0, 1], repeat=7)), dtype=np.int8)
+PATTERN_FREQ = ALL_PATTERNS.sum(axis=1)
+PATTERN_MAX_GAP = np.array([_max_gap(p) for p in ALL_PATTERNS])
+
+def get_valid_patterns(daily_tons, must_be_frequent):
+    """基于风险和物理约束，生成合法的排班模式 (返回 (k, 7) 的 int8 矩阵，每行一种模式)"""
+    # [cite: 90] 频率只能是 2 或 3
+    mask = (PATTERN_FREQ >= 2) & (PATTERN_FREQ <= 3)
+    # [cite: 101] 鼠患约束：高风险区必须 >= 3次
+    if must_be_frequent: mask &= PATTERN_FREQ >= 3
+    # 卫生与物理爆仓死线
+    mask &= PATTERN_MAX_GAP <= MAX_GAP_DAYS
+    mask &= (PATTERN_MAX_GAP * daily_tons) <= STREET_CAPACITY_TONS
+
+    valid_patterns = ALL_PATTERNS[mask]
     # 保底逻辑：如果太严格导致没模式可选，强制给个 1010100
-    if not valid_patterns:
-        valid_patterns.append(np.array([1,0,1,0,1,0,0]))
-        
+    if len(valid_patterns) == 0:
+        valid_patterns = np.array([[1,0,1,0,1,0,0]], dtype=np.int8)
+
     return valid_patterns
 
+def build_pattern_pool(districts):
+    """所有区的候选模式拼成一张 int8 表 pats，第 i 个区的候选在 offs[i]:offs[i+1] (存回 districts)"""
+    pools = [get_valid_patterns(t, h) for t, h in zip(districts['daily_tons'], districts['is_high_risk'])]
+    districts['pats'] = np.concatenate(pools)
+    districts['offs'] = np.cumsum([0] + [len(p) for p in pools]).astype(np.int64)
+    # 只有一个候选模式的区没法扰动，退火时只在"可动"的区里抽
+    districts['movable'] = np.flatnonzero(np.diff(districts['offs']) > 1).astype(np.int64)
+    # 每个候选模式的频次和单次清运量也在这里一次算好，退火时直接查表
+    # 假设均匀产生：单次量 = 日产量 * 7 / 频率
+    districts['pat_freq'] = districts['pats'].sum(axis=1, dtype=np.int8)
+    districts['pat_load'] = np.repeat(districts['daily_tons'], np.diff(districts['offs'])) * 7.0 / districts['pat_freq']
+    return districts
+
 # ================= 3. 核心评估函数 (Topology Logic) =================
 
-def calculate_trucks_with_topology(day_active_districts, district_map):
+# 下面这些函数只接收 NumPy 数组 / 标量，交给 Numba 编译 (没装 Numba 时按普通 Python 跑)
+# 位掩码约定: 第 i 位为 1 表示第 i 个区 (NODE_INDEX) 当天收运
+
+@njit(cache=True)
+def _comp_trucks(comp, loads, capacity):
+    # 这一组邻居拼单后需要的车 (向上取整)
+    load = 0.0
+    while comp:
+        low = comp & -comp
+        load += loads[_popcount(low - 1)]
+        comp ^= low
+    return math.ceil(load / capacity)
+
+@njit(cache=True)
+def calculate_trucks_with_topology(active, loads, adj, capacity):
     """
     [cite: 95] 核心逻辑：基于拓扑的拼车计算
     只有连通的邻居才能共享卡车容量
+    active: 当天收运的区 (位掩码); loads: 各区单次清运量 (按节点下标)
     """
-    if not day_active_districts: return 0
-    
-    # 找出当天的连通分量 (Connected Components)
-    subgraph = G.subgraph(day_active_districts)
-    components = list(nx.connected_components(subgraph))
-    
-    total_trucks_needed = 0
-    
-    for component in components:
-        # 这一组邻居的总垃圾量
-        component_total_load = sum(district_map[node]['load_today'] for node in component)
-        # 这一组需要的车 (拼单后的向上取整)
-        trucks = math.ceil(component_total_load / TRUCK_CAPACITY)
-        total_trucks_needed += trucks
-        
-    return total_trucks_needed
+    trucks = 0
+    while active:
+        comp = component(active & -active, active, adj)
+        trucks += _comp_trucks(comp, loads, capacity)
+        active &= ~comp
+    return trucks
+
+@njit(cache=True)
+def _local_trucks(active, node, loads, adj, capacity):
+    """只统计与 node 或其邻居相连的那些连通块的车数 (其余连通块不受 node 变化影响)"""
+    seeds = ((1 << node) | adj[node]) & active
+    trucks = 0
+    while seeds:
+        comp = component(seeds & -seeds, active, adj)
+        trucks += _comp_trucks(comp, loads, capacity)
+        seeds &= ~comp
+    return trucks
+
+@njit(cache=True)
+def _init_nb(pats, offs, chosen, node_idx, pat_load, adj, capacity,
+             loads, daily_active, daily_trucks, daily_cohesion):
+    # 1. 每个区当前的单次清运量 (查模式池里预先算好的表)
+    for i in range(chosen.shape[0]):
+        row = offs[i] + chosen[i]
+        loads[node_idx[i]] = pat_load[row]
+        for day in range(7):
+            if pats[row, day] == 1: daily_active[day] |= 1 << node_idx[i]
 
-def evaluate_solution(districts, indices):
-    d_map = {d['id']: d for d in districts}
-    daily_trucks = np.zeros(7)
-    total_cohesion_score = 0
-    
-    # 1. 预计算每个区当前的单次清运量
-    for i, d in enumerate(districts):
-        pat = d['patterns'][indices[i]]
-        d['current_pattern'] = pat
-        # 假设均匀产生：单次量 = 日产量 * 7 / 频率
-        d['pickup_load'] = d['daily_tons'] * 7.0 / sum(pat)
-        
     # 2. 逐日计算
     for day in range(7):
-        active_nodes = []
-        for d in districts:
-            if d['current_pattern'][day] == 1:
-                active_nodes.append(d['id'])
-                d_map[d['id']]['load_today'] = d['pickup_load']
-        
+        active = daily_active[day]
         # A. 计算卡车需求 (Hard Cost)
-        daily_trucks[day] = calculate_trucks_with_topology(active_nodes, d_map)
-        
+        daily_trucks[day] = calculate_trucks_with_topology(active, loads, adj, capacity)
         # B. 计算内聚性 (Soft Reward) - 这是引导算法走出局部最优的关键！
-        if len(active_nodes) > 1:
-            subgraph = G.subgraph(active_nodes)
-            # 边数越多，说明邻居同步率越高，越容易产生"拼车"
-            total_cohesion_score += subgraph.number_of_edges()
-            
-    max_trucks = np.max(daily_trucks)
-    var_trucks = np.var(daily_trucks)
-    
+        # 边数越多，说明邻居同步率越高，越容易产生"拼车" (每条边在两端各数一次)
+        edges2 = 0
+        m = active
+        while m:
+            low = m & -m
+            edges2 += _popcount(adj[_popcount(low - 1)] & active)
+            m ^= low
+        daily_cohesion[day] = edges2 // 2
+
+@njit(cache=True)
+def _move_nb(pats, offs, chosen, node_idx, pat_load, adj, capacity,
+             loads, daily_active, daily_trucks, daily_cohesion, i, new_val):
+    node = node_idx[i]
+    bit = 1 << node
+    old_val = chosen[i]
+    old_row, new_row = offs[i] + old_val, offs[i] + new_val
+    new_load = pat_load[new_row]
+    old_load = loads[node]
+    # 频次不变时只有 0/1 翻转的天受影响；频次变了，单次量也变，所有收运日都受影响
+    load_changed = new_load != old_load
+
+    for day in range(7):
+        was, now = pats[old_row, day], pats[new_row, day]
+        if was == now and not (load_changed and now == 1): continue
+        active = daily_active[day]
+        # 旧状态下受影响连通块的车数 / 内聚边数
+        loads[node] = old_load
+        old_trucks = _local_trucks(active, node, loads, adj, capacity)
+        old_edges = _popcount(adj[node] & active) if was == 1 else 0
+        active = (active | bit) if now == 1 else (active & ~bit)
+        loads[node] = new_load
+        new_trucks = _local_trucks(active, node, loads, adj, capacity)
+        new_edges = _popcount(adj[node] & active) if now == 1 else 0
+        daily_active[day] = active
+        daily_trucks[day] += new_trucks - old_trucks
+        daily_cohesion[day] += new_edges - old_edges
+    loads[node] = new_load
+    chosen[i] = new_val
+    return old_val
+
+def _kernel_args(state):
+    return (state['pats'], state['offs'], state['chosen'], state['node_idx'], state['pat_load'],
+            ADJ_BITMASK, TRUCK_CAPACITY,
+            state['loads'], state['daily_active'], state['daily_trucks'], state['daily_cohesion'])
+
+def init_state(districts, indices):
+    """
+    全量计算一次，得到可增量更新的状态 (全部是 NumPy 数组，需先 build_pattern_pool):
+    每天的活跃区 (位掩码) / 卡车数 / 内聚边数，以及各区当前模式下的单次清运量
+    """
+    state = {
+        'pats': districts['pats'],
+        'offs': districts['offs'],
+        'chosen': np.array(indices, dtype=np.int64),
+        'node_idx': districts['node_idx'],
+        'pat_load': districts['pat_load'],
+        'loads': np.zeros(N_NODES),
+        'daily_active': np.zeros(7, dtype=np.int64),
+        'daily_trucks': np.zeros(7),
+        'daily_cohesion': np.zeros(7, dtype=np.int64),
+    }
+    _init_nb(*_kernel_args(state))
+    return state
+
+def apply_move(state, i, new_val):
+    """
+    把第 i 个区切换到模式 new_val，只重算受影响的天和受影响的连通块。
+    返回旧模式编号 (拒绝时用它再调用一次即可回滚)
+    """
+    return _move_nb(*_kernel_args(state), i, new_val)
+
+@njit(cache=True)
+def _cost_nb(daily_trucks, daily_cohesion, w_trucks, w_var, w_cohesion):
     # Cost = (卡车数权重) + (波动权重) - (内聚奖励)
-    cost = (W_TRUCKS * max_trucks) + (W_VAR * var_trucks) - (W_COHESION * total_cohesion_score)
-    
-    return cost, daily_trucks
+    return (w_trucks * daily_trucks.max()) + (w_var * np.var(daily_trucks)) - (w_cohesion * daily_cohesion.sum())
+
+def state_cost(state):
+    return _cost_nb(state['daily_trucks'], state['daily_cohesion'], W_TRUCKS, W_VAR, W_COHESION)
+
+def evaluate_solution(districts, indices):
+    """
+    一次评估同时给出两种口径的每日车数: (代价, 拓扑共享下的每日车数, 不共享时的每日车数)
+    不共享 = 每个收运区单独派车，各自向上取整
+    """
+    state = init_state(districts, indices)
+    rows = districts['offs'][:-1] + state['chosen']
+    own_trucks = np.ceil(districts['pat_load'][rows] / TRUCK_CAPACITY)
+    daily_noshare = own_trucks @ districts['pats'][rows]
+    return state_cost(state), state['daily_trucks'], daily_noshare
 
 # ================= 4. 模拟退火求解器 =================
 
-def solve_sa(districts):
-    # 初始化模式池
-    print("正在生成合法模式池 (考虑鼠患风险 & 物理容量)...")
-    for d in districts:
-        d['patterns'] = get_valid_patterns(d)
+def cooling_schedule(t0=SA_T0, t_min=SA_T_MIN, alpha=SA_ALPHA):
+    """几何降温表 T_k = t0 * alpha^k (只保留 T > t_min 的部分)，整张表一次算好"""
+    n_iter = int(math.ceil(math.log(t_min / t0) / math.log(alpha))) + 1
+    temps = t0 * alpha ** np.arange(n_iter)
+    return temps[temps > t_min]
 
-    # 初始解
-    current_idx = [random.randint(0, len(d['patterns'])-1) for d in districts]
-    curr_cost, _ = evaluate_solution(districts, current_idx)
+@njit(cache=True)
+def _sa_chain(pats, offs, movable, node_idx, pat_load, adj, capacity,
+              w_trucks, w_var, w_cohesion, temps, seed):
+    """单条退火链: 随机初始解 -> 按降温表逐步扰动，返回 (最优代价, 最优模式编号)"""
+    np.random.seed(seed)
+    n = node_idx.shape[0]
+    sizes = offs[1:] - offs[:-1]
+
+    # 初始解 (状态只全量算这一次，之后每步增量更新)
+    chosen = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        chosen[i] = np.random.randint(0, sizes[i])
+    loads = np.zeros(adj.shape[0])
+    daily_active = np.zeros(7, dtype=np.int64)
+    daily_trucks = np.zeros(7)
+    daily_cohesion = np.zeros(7, dtype=np.int64)
+    _init_nb(pats, offs, chosen, node_idx, pat_load, adj, capacity,
+             loads, daily_active, daily_trucks, daily_cohesion)
+    curr_cost = _cost_nb(daily_trucks, daily_cohesion, w_trucks, w_var, w_cohesion)
     best_cost = curr_cost
-    best_idx = list(current_idx)
-    
-    # SA 参数
-    T = 3000.0
-    alpha = 0.99
-    
-    print(f"开始优化 (Initial Cost: {curr_cost:.1f})...")
-    while T > 0.1:
-        # 随机选择一个街区改变排班
-        idx = random.randint(0, len(districts)-1)
-        if len(districts[idx]['patterns']) <= 1: continue
-        
-        old_val = current_idx[idx]
-        new_val = random.randint(0, len(districts[idx]['patterns'])-1)
-        
-        current_idx[idx] = new_val
-        new_cost, _ = evaluate_solution(districts, current_idx)
-        
-        # Metropolis 准则
+    best_idx = chosen.copy()
+    if movable.shape[0] == 0: return best_cost, best_idx  # 每个区都只有一种模式，无需搜索
+
+    # 回温点: 降温表中第一个不高于 SA_T_REHEAT 的位置
+    k_reheat = np.searchsorted(-temps, -SA_T_REHEAT)
+    since_improve = 0
+    accepted = 0
+    k = 0
+    step = 1
+    it = 0
+    while k < temps.shape[0]:
+        T = temps[k]
+        # 随机选择一个 (可动的) 街区改变排班
+        idx = movable[np.random.randint(0, movable.shape[0])]
+
+        new_val = np.random.randint(0, sizes[idx])
+        old_val = _move_nb(pats, offs, chosen, node_idx, pat_load, adj, capacity,
+                           loads, daily_active, daily_trucks, daily_cohesion, idx, new_val)
+        new_cost = _cost_nb(daily_trucks, daily_cohesion, w_trucks, w_var, w_cohesion)
+
+        # Metropolis 准则: u < exp(-delta/T) 等价于 T*log(u) < -delta，省掉 exp
         delta = new_cost - curr_cost
-        if delta < 0 or random.random() < math.exp(-delta/T):
+        if delta < 0 or T * np.log(np.random.random()) < -delta:
             curr_cost = new_cost
+            accepted += 1
             if curr_cost < best_cost:
                 best_cost = curr_cost
-                best_idx = list(current_idx)
+                best_idx[:] = chosen
+                since_improve = -1
         else:
-            current_idx[idx] = old_val # Revert
-            
-        T *= alpha
-        
-    return districts, best_idx
+            _move_nb(pats, offs, chosen, node_idx, pat_load, adj, capacity,
+                     loads, daily_active, daily_trucks, daily_cohesion, idx, old_val) # Revert
+
+        # 平台期检测: 久无改进先回温，再久就提前结束
+        since_improve += 1
+        if since_improve >= SA_STOP_AFTER: break
+        if since_improve > 0 and since_improve % SA_REHEAT_AFTER == 0 and k > k_reheat:
+            k = k_reheat
+            continue
+
+        # 自适应降温: 每 SA_ACCEPT_WINDOW 步看一次接受率，太高就一次跨两格 (相当于 alpha^2)
+        it += 1
+        if it % SA_ACCEPT_WINDOW == 0:
+            step = 2 if accepted > SA_TARGET_ACCEPT * SA_ACCEPT_WINDOW else 1
+            accepted = 0
+        k += step
+    return best_cost, best_idx
+
+@njit(parallel=True, cache=True)
+def _sa_parallel(n_chains, seed, pats, offs, movable, node_idx, pat_load, adj, capacity,
+                 w_trucks, w_var, w_cohesion, temps):
+    """n_chains 条互相独立的退火链并行跑 (每条链固定种子 seed + k，结果可复现)"""
+    best_costs = np.empty(n_chains)
+    best_idx = np.empty((n_chains, node_idx.shape[0]), dtype=np.int64)
+    for k in prange(n_chains):
+        cost, idx = _sa_chain(pats, offs, movable, node_idx, pat_load, adj, capacity,
+                              w_trucks, w_var, w_cohesion, temps, seed + k)
+        best_costs[k] = cost
+        best_idx[k] = idx
+    return best_costs, best_idx
+
+def solve_sa(districts, n_chains=SA_CHAINS, seed=SA_SEED):
+    # 初始化模式池
+    print("正在生成合法模式池 (考虑鼠患风险 & 物理容量)...")
+    build_pattern_pool(districts)
+
+    print(f"开始优化 ({n_chains} 条独立退火链并行)...")
+    best_costs, best_idx = _sa_parallel(n_chains, seed, districts['pats'], districts['offs'], districts['movable'],
+                                        districts['node_idx'], districts['pat_load'], ADJ_BITMASK, TRUCK_CAPACITY,
+                                        W_TRUCKS, W_VAR, W_COHESION, cooling_schedule())
+    k = int(np.argmin(best_costs))
+    print(f"各链最优代价: min={best_costs.min():.1f}, max={best_costs.max():.1f} (采用第 {k} 条)")
+    return districts, [int(v) for v in best_idx[k]]
 
 # ================= 5. 结果分析与保存 =================
 
@@ -226,21 +376,13 @@ def analyze_and_save(districts, indices):
     """
     [cite: 95] 回答核心问题：共享到底省了多少车？
     """
-    _, final_loads = evaluate_solution(districts, indices)
-    
-    # 计算 "孤岛模式" (No Sharing) 的需求
-    no_share_max_trucks = 0
-    days_no_share = np.zeros(7)
-    
-    for day in range(7):
-        day_sum = 0
-        for i, d in enumerate(districts):
-            pat = d['patterns'][indices[i]]
-            if pat[day] == 1:
-                load = d['daily_tons'] * 7.0 / sum(pat)
-                # 每个人单独派车
-                day_sum += math.ceil(load / TRUCK_CAPACITY)
-        days_no_share[day] = day_sum
+    # 共享 / "孤岛模式" (No Sharing) 两种需求一次评估得到
+    _, final_loads, days_no_share = evaluate_solution(districts, indices)
+
+    # 每个区选中的模式 (n x 7) 及其频次
+    rows = districts['offs'][:-1] + np.asarray(indices)
+    sched = districts['pats'][rows]
+    freq = districts['pat_freq'][rows]
     
     max_no_share = np.max(days_no_share)
     max_with_share = np.max(final_loads)
@@ -262,13 +404,12 @@ def analyze_and_save(districts, indices):
     # 保存 CSV
     res = []
     days = ['Mon','Tue','Wed','Thu','Fri','Sat','Sun']
-    for i, d in enumerate(districts):
-        pat = d['patterns'][indices[i]]
+    for i, pat in enumerate(sched):
         row = {
-            'District': d['id'], 
-            'Risk_Level': 'HIGH' if d['is_high_risk'] else 'Normal',
-            'Avg_Daily_Tons': round(d['daily_tons'], 1),
-            'Freq': sum(pat)
+            'District': districts['id'][i], 
+            'Risk_Level': 'HIGH' if districts['is_high_risk'][i] else 'Normal',
+            'Avg_Daily_Tons': round(districts['daily_tons'][i], 1),
+            'Freq': int(freq[i])
         }
         for j, val in enumerate(pat):
             row[days[j]] = '✓' if val else '-'
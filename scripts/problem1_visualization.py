@@ -3,11 +3,15 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import networkx as nx
-import math
 import os
+from topology import REAL_TOPOLOGY, NODE_INDEX, components
 
 # ================= 配置 =================
 INPUT_FILE = 'problem1_final_solution.csv'
+# 输出格式: 矢量图 (svg/pdf) 不走 Agg 逐像素栅格化，出图快、文件小；需要位图时改成 'png' (按 300 dpi)
+FIG_FORMAT = 'svg'
+# False 时图比排班表新就跳过重画 (类似 make)；改了绘图代码想强制重画就设为 True
+FORCE_REDRAW = False
 # 设置绘图风格 - 学术风
 plt.style.use('seaborn-v0_8-whitegrid')
 sns.set_context("paper", font_scale=1.4)
@@ -17,21 +21,8 @@ plt.rcParams['axes.unicode_minus'] = False
 # 车辆参数 (必须与建模代码一致)
 TRUCK_CAPACITY = 12.0 * 0.9 
 
-# 拓扑结构 (用于画网络图)
-REAL_TOPOLOGY = {
-    'MN01': ['MN02', 'MN03'],
-    'MN02': ['MN01', 'MN03', 'MN04'],
-    'MN03': ['MN01', 'MN02', 'MN06'],
-    'MN04': ['MN02', 'MN05', 'MN07'],
-    'MN05': ['MN04', 'MN06', 'MN07'],
-    'MN06': ['MN03', 'MN05', 'MN08'],
-    'MN07': ['MN04', 'MN05', 'MN08', 'MN09'],
-    'MN08': ['MN06', 'MN07', 'MN11'],
-    'MN09': ['MN07', 'MN10', 'MN12'],
-    'MN10': ['MN09', 'MN11', 'MN12'],
-    'MN11': ['MN08', 'MN10', 'MN12'],
-    'MN12': ['MN09', 'MN10', 'MN11']
-}
+# 拓扑图 (只用于画网络图)，模块加载时建一次
+TOPO_GRAPH = nx.Graph(REAL_TOPOLOGY)
 
 # ================= 数据加载与处理 =================
 
@@ -60,50 +51,60 @@ def load_or_mock_data():
             data.append(row)
         df = pd.DataFrame(data)
     
-    # 转换排班符号为数字
+    # 转换排班符号为数字 (7 列整块比较，不逐格调 lambda)
     days = ['Mon','Tue','Wed','Thu','Fri','Sat','Sun']
-    for day in days:
-        df[f'{day}_Num'] = df[day].apply(lambda x: 1 if '✓' in str(x) or 'Pickup' in str(x) else 0)
+    df[[f'{day}_Num' for day in days]] = df[days].isin(['✓', 'Pickup']).to_numpy(dtype=np.int8)
     
     return df
 
 def calculate_daily_trucks_with_topology(df):
     """重算每天的卡车需求（带拓扑逻辑）"""
-    G = nx.Graph(REAL_TOPOLOGY)
     days = ['Mon','Tue','Wed','Thu','Fri','Sat','Sun']
-    daily_trucks = []
-    
-    for day in days:
-        # 1. 找出当天工作的节点
-        active_rows = df[df[f'{day}_Num'] == 1]
-        active_nodes = active_rows['District'].tolist()
-        
-        if not active_nodes:
-            daily_trucks.append(0)
-            continue
-            
-        # 2. 计算当天每个区的单次运量
-        # load = daily_tons * 7 / freq
-        node_loads = {}
-        for _, row in active_rows.iterrows():
-            load = row['Avg_Daily_Tons'] * 7.0 / row['Freq']
-            node_loads[row['District']] = load
-            
-        # 3. 拓扑聚类
-        subgraph = G.subgraph(active_nodes)
-        components = list(nx.connected_components(subgraph))
-        
-        total_trucks = 0
-        for comp in components:
-            comp_load = sum(node_loads[n] for n in comp)
-            total_trucks += math.ceil(comp_load / TRUCK_CAPACITY)
-        
-        daily_trucks.append(total_trucks)
-        
+
+    # 1. 排班矩阵 (区 x 天) 和每个区的单次运量: load = daily_tons * 7 / freq
+    sched = df[[f'{day}_Num' for day in days]].to_numpy(dtype=np.int8)
+    load_per_visit = (df['Avg_Daily_Tons'] * 7.0 / df['Freq']).to_numpy()
+    node_idx = df['District'].map(NODE_INDEX).to_numpy()
+
+    # 2. 每天工作的节点压成一个位掩码 (7 天一次算完)
+    active_by_day = (sched.T.astype(np.int64) << node_idx).sum(axis=1)
+
+    # 3. 拓扑聚类: 先收集一周内所有连通块，再一次性算块内总量并向上取整
+    comp_day, comp_mask = [], []
+    for day, active in enumerate(active_by_day):
+        for comp in components(int(active)):
+            comp_day.append(day)
+            comp_mask.append(comp)
+    in_comp = (np.array(comp_mask, dtype=np.int64)[:, None] >> node_idx) & 1  # (连通块数, 区数) 0/1 矩阵
+    comp_trucks = np.ceil(in_comp @ load_per_visit / TRUCK_CAPACITY)
+    daily_trucks = np.bincount(np.array(comp_day, dtype=np.int64), weights=comp_trucks, minlength=7).astype(int).tolist()
+
     return days, daily_trucks
 
 # ================= 绘图函数 =================
 
+def fig_path(name):
+    return f'{name}.{FIG_FORMAT}'
+
+def save_fig(name):
+    """按 FIG_FORMAT 保存当前图"""
+    out = fig_path(name)
+    if FIG_FORMAT == 'png':
+        plt.savefig(out, dpi=300)
+    else:
+        plt.savefig(out)
+    print(f"Generated: {out}")
+
+def is_up_to_date(name):
+    """输出图已存在且不比排班表旧 -> 不用重画 (用模拟数据时总是重画)"""
+    out = fig_path(name)
+    if FORCE_REDRAW or not os.path.exists(INPUT_FILE) or not os.path.exists(out):
+        return False
+    if os.path.getmtime(out) >= os.path.getmtime(INPUT_FILE):
+        print(f"Up to date, skipped: {out}")
+        return True
+    return False
+
 def plot_schedule_heatmap(df):
     """图1：排班热力图 - 展示错峰情况"""
     days = ['Mon','Tue','Wed','Thu','Fri','Sat','Sun']
@@ -128,8 +129,7 @@ def plot_schedule_heatmap(df):
     plt.title('Optimized Collection Schedule (H=High Risk)', fontsize=16, pad=20)
     plt.ylabel('District')
     plt.tight_layout()
-    plt.savefig('Viz_1_Schedule_Heatmap.png', dpi=300)
-    print("Generated: Viz_1_Schedule_Heatmap.png")
+    save_fig('Viz_1_Schedule_Heatmap')
 
 def plot_truck_demand(days, trucks):
     """图2：每日车队需求 - 展示均衡性"""
@@ -154,12 +154,11 @@ def plot_truck_demand(days, trucks):
     plt.legend()
     plt.grid(axis='y', linestyle='--', alpha=0.7)
     plt.tight_layout()
-    plt.savefig('Viz_2_Daily_Trucks.png', dpi=300)
-    print("Generated: Viz_2_Daily_Trucks.png")
+    save_fig('Viz_2_Daily_Trucks')
 
 def plot_topology_network(df, target_day='Mon'):
     """图3：拓扑网络图 - 展示拼车效应"""
-    G = nx.Graph(REAL_TOPOLOGY)
+    G = TOPO_GRAPH
     
     # 确定当天工作的节点
     active_mask = df[f'{target_day}_Num'] == 1
@@ -207,8 +206,7 @@ def plot_topology_network(df, target_day='Mon'):
     plt.legend(handles=legend_elements, loc='upper right')
     
     plt.tight_layout()
-    plt.savefig('Viz_3_Topology_Net.png', dpi=300)
-    print("Generated: Viz_3_Topology_Net.png")
+    save_fig('Viz_3_Topology_Net')
 
 def plot_risk_compliance(df):
     """图4：风险合规性检查"""
@@ -227,8 +225,7 @@ def plot_risk_compliance(df):
                 ha="center", fontsize=10, bbox={"facecolor":"orange", "alpha":0.2, "pad":5})
     
     plt.tight_layout()
-    plt.savefig('Viz_4_Risk_Compliance.png', dpi=300)
-    print("Generated: Viz_4_Risk_Compliance.png")
+    save_fig('Viz_4_Risk_Compliance')
 
 # ================= 主程序 =================
 
@@ -243,15 +240,15 @@ if __name__ == "__main__":
     print("Starting visualization generation...")
     
     # 图 1: 排班表
-    plot_schedule_heatmap(df)
+    if not is_up_to_date('Viz_1_Schedule_Heatmap'): plot_schedule_heatmap(df)
     
     # 图 2: 每日卡车均衡图
-    plot_truck_demand(days, trucks)
+    if not is_up_to_date('Viz_2_Daily_Trucks'): plot_truck_demand(days, trucks)
     
     # 图 3: 拓扑拼车示意图 (以周一为例)
-    plot_topology_network(df, target_day='Mon')
+    if not is_up_to_date('Viz_3_Topology_Net'): plot_topology_network(df, target_day='Mon')
     
     # 图 4: 鼠患风险合规图
-    plot_risk_compliance(df)
+    if not is_up_to_date('Viz_4_Risk_Compliance'): plot_risk_compliance(df)
     
-    print("\nVisualization Complete! Check the .png files in your folder.")
\ No newline at end of file
+    print(f"\nVisualization Complete! Check the .{FIG_FORMAT} files in your folder.")
\ No newline at end of file
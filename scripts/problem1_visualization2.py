@@ -2,40 +2,28 @@ import pandas as pd
 import geopandas as gpd
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
-from shapely import wkt
 from shapely.geometry import Polygon, LineString
-import networkx as nx
 import numpy as np
 import os
+from topology import REAL_TOPOLOGY, NODE_INDEX, N_NODES, ADJ_BITMASK, component
+from _jit import njit
+from mn_map import parse_wkt
+from plot_cache import data_key, is_up_to_date, mark_drawn
 
 # ================= 配置区域 =================
 # 地图数据路径 (请确保路径正确)
 MAP_FILE = '../raw_data/DSNY_Districts_20251130.csv' 
 # 排班结果路径 (上一轮生成的)
 SCHEDULE_FILE = 'problem1_final_solution.csv'
+# 输出图
+OUTPUT_PNG = 'Viz_Advanced_Infeasibility.png'
+# 数据没变就跳过重画 (出图记录见 plot_cache.py)；改了绘图代码想强制重画就把 FORCE_REDRAW 设为 True
+FORCE_REDRAW = False
 
-# 真实的曼哈顿拓扑
-REAL_TOPOLOGY = {
-    'MN01': ['MN02', 'MN03'],
-    'MN02': ['MN01', 'MN03', 'MN04'],
-    'MN03': ['MN01', 'MN02', 'MN06'],
-    'MN04': ['MN02', 'MN05', 'MN07'],
-    'MN05': ['MN04', 'MN06', 'MN07'],
-    'MN06': ['MN03', 'MN05', 'MN08'],
-    'MN07': ['MN04', 'MN05', 'MN08', 'MN09'],
-    'MN08': ['MN06', 'MN07', 'MN11'],
-    'MN09': ['MN07', 'MN10', 'MN12'],
-    'MN10': ['MN09', 'MN11', 'MN12'],
-    'MN11': ['MN08', 'MN10', 'MN12'],
-    'MN12': ['MN09', 'MN10', 'MN11']
-}
+# 真实的曼哈顿拓扑见 topology.py (ADJ_BITMASK: 每个区一个 12 bit 邻接掩码)
 
 # ================= 1. 数据加载模块 =================
 
-def safe_wkt_load(wkt_string):
-    try: return wkt.loads(wkt_string)
-    except: return None
-
 def create_mock_map():
     """如果找不到地图文件，创建一个简易的方格地图用于演示"""
     print("⚠️ 未找到地图文件，生成简易 Mock 地图...")
@@ -59,16 +47,15 @@ def load_data():
     # 1. 加载地图
     if os.path.exists(MAP_FILE):
         try:
-            df = pd.read_csv(MAP_FILE)
-            # 解析几何列
-            if 'multipolygon' in df.columns:
-                df['geometry'] = df['multipolygon'].apply(safe_wkt_load)
-            elif 'geometry' in df.columns:
-                df['geometry'] = df['geometry'].apply(safe_wkt_load)
+            # 只读分区名和几何列 (两种几何列名都兼容; 先读表头挑列，pyarrow 引擎不支持按函数选列)
+            geo_cols = [c for c in pd.read_csv(MAP_FILE, nrows=0).columns if c in ('DISTRICT', 'multipolygon', 'geometry')]
+            df = pd.read_csv(MAP_FILE, usecols=geo_cols, engine='pyarrow')
+            # 先过滤曼哈顿，再只解析这些行的几何列
+            df = df[df['DISTRICT'].str.startswith('MN', na=False)].copy()
+            wkt_col = 'multipolygon' if 'multipolygon' in df.columns else 'geometry'
+            df['geometry'] = parse_wkt(df[wkt_col])
                 
             gdf = gpd.GeoDataFrame(df[df['geometry'].notna()], geometry='geometry')
-            # 过滤曼哈顿
-            gdf = gdf[gdf['DISTRICT'].str.startswith('MN')]
             print(f"✅ 成功加载地图文件: {len(gdf)} 个分区")
         except Exception as e:
             print(f"❌ 地图加载失败: {e}")
@@ -94,23 +81,41 @@ def load_data():
 
 # ================= 2. 核心计算逻辑 =================
 
+@njit(cache=True)
+def _cc_labels(node_idx, adj_bits):
+    """
+    当天工作区的连通分量 (按 topology.component 逐块扩展，活跃集合是位掩码)
+    node_idx: 各工作区的节点编号; 返回 (分量数, 各区标签)，标签按各块首个区出现的先后编号
+    """
+    n = node_idx.shape[0]
+    active = 0
+    for k in range(n): active |= 1 << node_idx[k]
+    labels = -np.ones(n, dtype=np.int64)
+    n_comp = 0
+    for k in range(n):
+        if labels[k] >= 0: continue
+        comp = component(1 << node_idx[k], active, adj_bits)
+        for j in range(n):
+            if (comp >> node_idx[j]) & 1: labels[j] = n_comp
+        n_comp += 1
+    return n_comp, labels
+
 def get_daily_clusters(active_districts):
     """
     计算当天的连通分量 (Sharing Groups)
     """
     if not active_districts: return []
     
-    G = nx.Graph()
-    G.add_nodes_from(active_districts)
+    # 只沿当天工作的区之间的边 (即相邻关系) 扩展
+    # 不在拓扑里的区接在 12 个区后面编号，邻接掩码为 0，各自单独成块
+    extra = {}
+    idx = np.array([NODE_INDEX[d] if d in NODE_INDEX else extra.setdefault(d, N_NODES + len(extra))
+                    for d in active_districts], dtype=np.int64)
+    adj_bits = np.concatenate([ADJ_BITMASK, np.zeros(len(extra), dtype=np.int64)]) if extra else ADJ_BITMASK
+    n_comp, labels = _cc_labels(idx, adj_bits)
     
-    # 仅添加存在的边（即相邻关系）
-    for node in active_districts:
-        neighbors = REAL_TOPOLOGY.get(node, [])
-        for nb in neighbors:
-            if nb in active_districts:
-                G.add_edge(node, nb)
-    
-    return list(nx.connected_components(G))
+    # 按标签分组 (标签按各块首个区在 active_districts 中出现的先后编号)
+    return [{active_districts[j] for j in np.flatnonzero(labels == k)} for k in range(n_comp)]
 
 # ================= 3. 绘图逻辑 (已修复报错) =================
 
@@ -123,6 +128,16 @@ def plot_logistics_analysis(gdf, sched_df):
     
     # 颜色池
     cluster_colors = ['#2ecc71', '#3498db', '#9b59b6', '#f1c40f', '#e67e22', '#1abc9c']
+
+    # 各区中心点整列算一次 (7 个子图共用)，不在循环里逐行 .centroid
+    # 区名 -> 行号，之后按行号直接取行 / 取坐标，不再每个 cluster 全表 isin 过滤
+    cent = gdf.geometry.centroid
+    cent_xy = np.column_stack([cent.x.to_numpy(), cent.y.to_numpy()])
+    dist_to_idx = {d: i for i, d in enumerate(gdf['DISTRICT'])}
+
+    # 7 天的工作掩码一次算完 (区 x 天)，单元格里含 'Pickup' 或 '✓' 即工作
+    vals = sched_df[days].astype(str).to_numpy().astype(str)
+    active_np = (np.char.find(vals, 'Pickup') >= 0) | (np.char.find(vals, '✓') >= 0)
     
     for i, day in enumerate(days):
         ax = axes[i]
@@ -131,9 +146,7 @@ def plot_logistics_analysis(gdf, sched_df):
         gdf.plot(ax=ax, color='#ecf0f1', edgecolor='white')
         
         # 2. 获取当天工作的区域
-        day_col = sched_df[day].astype(str)
-        active_mask = day_col.str.contains('Pickup') | day_col.str.contains('✓')
-        active_districts = sched_df[active_mask]['District'].tolist()
+        active_districts = sched_df.loc[active_np[:, i], 'District'].tolist()
         
         if not active_districts:
             ax.set_title(f"{day} (No Service)", fontsize=14)
@@ -147,18 +160,14 @@ def plot_logistics_analysis(gdf, sched_df):
         for c_idx, cluster in enumerate(clusters):
             color = cluster_colors[c_idx % len(cluster_colors)]
             
-            # 染色
-            cluster_gdf = gdf[gdf['DISTRICT'].isin(cluster)]
-            cluster_gdf.plot(ax=ax, color=color, alpha=0.8, edgecolor='black')
+            # 染色 (行号排序，保持与原表相同的绘制顺序)
+            rows = sorted(dist_to_idx[d] for d in cluster if d in dist_to_idx)
+            gdf.iloc[rows].plot(ax=ax, color=color, alpha=0.8, edgecolor='black')
             
             # 画内部连接线 (Topology Edges)
             if len(cluster) > 1:
-                # === 修复核心: 安全构建坐标字典 ===
-                c_dict = {}
-                for idx, row in cluster_gdf.iterrows():
-                    centroid = row['geometry'].centroid
-                    c_dict[row['DISTRICT']] = (centroid.x, centroid.y)
-                # =================================
+                # 坐标字典: 区名 -> 预先算好的中心点
+                c_dict = {d: cent_xy[dist_to_idx[d]] for d in cluster if d in dist_to_idx}
                 
                 processed_edges = set()
                 for node in cluster:
@@ -177,26 +186,23 @@ def plot_logistics_analysis(gdf, sched_df):
                 c1_node = list(clusters[0])[0]
                 c2_node = list(clusters[1])[0]
                 
-                # 获取坐标 (安全方式)
-                p1_geo = gdf[gdf['DISTRICT']==c1_node].geometry.centroid.iloc[0]
-                p2_geo = gdf[gdf['DISTRICT']==c2_node].geometry.centroid.iloc[0]
+                # 获取坐标 (安全方式，取预先算好的中心点)
+                x1, y1 = cent_xy[dist_to_idx[c1_node]]
+                x2, y2 = cent_xy[dist_to_idx[c2_node]]
                 
                 # 画虚线
-                ax.plot([p1_geo.x, p2_geo.x], [p1_geo.y, p2_geo.y], color='#e74c3c', linestyle=':', linewidth=2)
+                ax.plot([x1, x2], [y1, y2], color='#e74c3c', linestyle=':', linewidth=2)
                 # 画个叉
-                mid_x, mid_y = (p1_geo.x + p2_geo.x)/2, (p1_geo.y + p2_geo.y)/2
+                mid_x, mid_y = (x1 + x2)/2, (y1 + y2)/2
                 ax.text(mid_x, mid_y, "✘", color='red', fontsize=20, ha='center', va='center', fontweight='bold')
                 ax.text(mid_x, mid_y-0.01, "No Sharing", color='red', fontsize=8, ha='center')
             except Exception as e:
                 pass # 如果算不出坐标就跳过标注
 
         # 标注名字
-        for _, row in gdf.iterrows():
-            if row['DISTRICT'] in active_districts:
-                try:
-                    cent = row['geometry'].centroid
-                    ax.annotate(row['DISTRICT'], (cent.x, cent.y), ha='center', fontsize=8, fontweight='bold', color='black')
-                except: pass
+        for name, (x, y) in zip(gdf['DISTRICT'], cent_xy):
+            if name in active_districts and not (np.isnan(x) or np.isnan(y)):
+                ax.annotate(name, (x, y), ha='center', fontsize=8, fontweight='bold', color='black')
 
         ax.set_title(f"{day}: {len(clusters)} Groups", fontsize=14, fontweight='bold')
         ax.axis('off')
@@ -215,11 +221,13 @@ def plot_logistics_analysis(gdf, sched_df):
     ax_legend.set_title("Why Global Pooling Fails?", fontsize=14, color='darkred')
     
     plt.tight_layout()
-    output_png = 'Viz_Advanced_Infeasibility.png'
-    plt.savefig(output_png, dpi=300)
-    print(f"🖼️ 可视化生成完毕: {output_png}")
+    plt.savefig(OUTPUT_PNG, dpi=300)
+    print(f"🖼️ 可视化生成完毕: {OUTPUT_PNG}")
     plt.show()
 
 if __name__ == "__main__":
     gdf, sched = load_data()
-    plot_logistics_analysis(gdf, sched)
\ No newline at end of file
+    key = data_key(gdf, sched)
+    if not is_up_to_date(OUTPUT_PNG, key, force=FORCE_REDRAW):
+        plot_logistics_analysis(gdf, sched)
+        mark_drawn(OUTPUT_PNG, key)
\ No newline at end of file
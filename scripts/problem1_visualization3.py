@@ -1,11 +1,17 @@
 import pandas as pd
 import geopandas as gpd
+import matplotlib
+matplotlib.use('Agg')  # 只存图不弹窗，用非交互后端，不加载 GUI 工具包
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
-from shapely import wkt
+from matplotlib.collections import PatchCollection
+from matplotlib.path import Path
 import numpy as np
 import os
 import seaborn as sns
+from concurrent.futures import ProcessPoolExecutor
+from mn_map import parse_wkt
+from plot_cache import CACHE_DIR, cache_is_fresh, data_key, is_up_to_date, mark_drawn
 
 # ================= 1. 文件路径配置 =================
 # 地图形状数据
@@ -14,14 +20,19 @@ MAP_FILE = '../raw_data/DSNY_Districts_20251130.csv'
 DATA_FILE = os.path.join('..', 'extra_data', 'merged_data', 'Manhattan_Data_Current_2023_2025.csv')
 # 你的求解结果
 SOLUTION_FILE = 'problem1_final_solution.csv'
+# 融合结果缓存 (GeoParquet)，任一源文件更新后自动重建
+CACHE_FILE = os.path.join(CACHE_DIR, 'manhattan_merged.parquet')
+# 数据没变就跳过重画 (按数据哈希判断)；改了绘图代码想强制重画就设为 True
+FORCE_REDRAW = False
 
 # ================= 2. 数据加载与融合引擎 =================
 
-def safe_wkt_load(wkt_string):
-    try: return wkt.loads(wkt_string)
-    except: return None
-
 def load_and_merge_data():
+    sources = (MAP_FILE, DATA_FILE, SOLUTION_FILE)
+    if cache_is_fresh(CACHE_FILE, sources):
+        print(f"⚡ 命中缓存: {CACHE_FILE}")
+        return gpd.read_parquet(CACHE_FILE)
+
     print("🔄 正在融合地理数据、老鼠数据与排班结果...")
     
     # 1. 加载地图几何信息
@@ -29,27 +40,25 @@ def load_and_merge_data():
         print(f"❌ 找不到地图文件: {MAP_FILE}")
         return None
     
-    map_df = pd.read_csv(MAP_FILE)
+    # 只读分区名和几何列 (先读表头挑列，pyarrow 引擎不支持按函数选列)
+    geo_cols = [c for c in pd.read_csv(MAP_FILE, nrows=0).columns if c in ('DISTRICT', 'multipolygon', 'geometry')]
+    map_df = pd.read_csv(MAP_FILE, usecols=geo_cols, engine='pyarrow')
+    map_df = map_df[map_df['DISTRICT'].str.startswith('MN', na=False)].copy() # 只看曼哈顿 (先筛行再解析 WKT)
     # 兼容两种列名
-    if 'multipolygon' in map_df.columns:
-        map_df['geometry'] = map_df['multipolygon'].apply(safe_wkt_load)
-    elif 'geometry' in map_df.columns:
-        map_df['geometry'] = map_df['geometry'].apply(safe_wkt_load)
+    wkt_col = 'multipolygon' if 'multipolygon' in map_df.columns else 'geometry'
+    map_df['geometry'] = parse_wkt(map_df[wkt_col])
         
     gdf = gpd.GeoDataFrame(map_df[map_df['geometry'].notna()], geometry='geometry')
-    gdf = gdf[gdf['DISTRICT'].str.startswith('MN')] # 只看曼哈顿
     
     # 2. 加载老鼠数据 (Rat_Complaints)
     if os.path.exists(DATA_FILE):
-        data_df = pd.read_csv(DATA_FILE)
+        data_df = pd.read_csv(DATA_FILE, usecols=lambda c: c in ('CD_ID', 'Rat_Complaints'))
         # 建立映射: MN01 -> Rat_Complaints
         # 注意：这里假设 CSV 里有 CD_ID 列，或者是按顺序排列
-        # 为了稳健，我们手动构建映射字典
-        rat_map = {}
-        for _, row in data_df.iterrows():
-            cd_id = int(row['CD_ID']) if 'CD_ID' in row else int(row.name)
-            dist_name = f"MN{cd_id % 100:02d}"
-            rat_map[dist_name] = row['Rat_Complaints']
+        # 为了稳健，我们手动构建映射字典 (整列拼区名，不逐行 iterrows)
+        cd = pd.Series(data_df['CD_ID'] if 'CD_ID' in data_df else data_df.index).astype(int)
+        dist = 'MN' + (cd % 100).astype(str).str.zfill(2)
+        rat_map = dict(zip(dist, data_df['Rat_Complaints']))
             
         gdf['Rat_Complaints'] = gdf['DISTRICT'].map(rat_map)
     else:
@@ -59,22 +68,22 @@ def load_and_merge_data():
     # 3. 加载排班结果 (Frequency)
     if os.path.exists(SOLUTION_FILE):
         sol_df = pd.read_csv(SOLUTION_FILE)
-        # 映射频率和风险等级
-        freq_map = dict(zip(sol_df['District'], sol_df['Freq']))
-        risk_map = dict(zip(sol_df['District'], sol_df['Risk_Level']))
-        
-        gdf['Frequency'] = gdf['DISTRICT'].map(freq_map).fillna(2)
-        gdf['Risk_Level'] = gdf['DISTRICT'].map(risk_map).fillna('Normal')
-        
-        # 把每天的排班也合进来
+        # 频率、风险等级和每天的排班一次 merge 合进来 (左连接，保持地图的行顺序)
         days = ['Mon','Tue','Wed','Thu','Fri','Sat','Sun']
-        for day in days:
-            day_status = dict(zip(sol_df['District'], sol_df[day]))
-            gdf[f'Status_{day}'] = gdf['DISTRICT'].map(day_status)
+        sol = sol_df[['District', 'Freq', 'Risk_Level', *days]].rename(
+            columns={'District': 'DISTRICT', 'Freq': 'Frequency', **{day: f'Status_{day}' for day in days}})
+        gdf = gdf.merge(sol, on='DISTRICT', how='left')
+        
+        gdf['Frequency'] = gdf['Frequency'].fillna(2)
+        gdf['Risk_Level'] = gdf['Risk_Level'].fillna('Normal')
     else:
         print("⚠️ 找不到求解结果，跳过...")
         return None
 
+    # 三个源文件都在才写缓存 (模拟数据不缓存)
+    if all(os.path.exists(p) for p in sources):
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        gdf.to_parquet(CACHE_FILE)
     return gdf
 
 # ================= 3. 绘图：鼠患-频率响应图 =================
@@ -87,6 +96,8 @@ def plot_rats_vs_frequency(gdf):
     结论 = 红色的地方都有斜线 -> 模型有效！
     """
     fig, ax = plt.subplots(figsize=(10, 12))
+    # 各区中心点整列算一次，用于标注区名
+    cent = gdf.geometry.centroid
     
     # 1. 绘制底色 (Choropleth based on Rats)
     # 使用 OrRd (Orange-Red) 色阶，代表危机程度
@@ -102,12 +113,10 @@ def plot_rats_vs_frequency(gdf):
                            hatch='///', linewidth=1.5, alpha=0.5)
     
     # 3. 标注区名
-    for _, row in gdf.iterrows():
-        try:
-            cent = row['geometry'].centroid
-            ax.annotate(text=row['DISTRICT'], xy=(cent.x, cent.y), 
-                        ha='center', fontsize=8, color='black', fontweight='bold')
-        except: pass
+    for name, x, y in zip(gdf['DISTRICT'], cent.x, cent.y):
+        if np.isnan(x) or np.isnan(y): continue # 算不出中心点就不标了
+        ax.annotate(text=name, xy=(x, y), 
+                    ha='center', fontsize=8, color='black', fontweight='bold')
 
     # 4. 自定义图例 (Patch)
     patch_3x = mpatches.Patch(facecolor='white', edgecolor='black', hatch='///', label='Mandatory 3x Pickup/Week')
@@ -125,6 +134,12 @@ def plot_rats_vs_frequency(gdf):
 
 # ================= 4. 绘图：每日运营脉搏图 =================
 
+def geom_to_path(geom):
+    """(Multi)Polygon -> 一条复合 Path (每块的外环 + 洞)，与 geopandas 画多边形的方式相同"""
+    parts = geom.geoms if hasattr(geom, 'geoms') else [geom]
+    return Path.make_compound_path(*[Path(np.asarray(ring.coords)[:, :2])
+                                     for p in parts for ring in (p.exterior, *p.interiors)])
+
 def plot_daily_pulse(gdf):
     """
     7张连环画，展示每一天曼哈顿哪里在收垃圾。
@@ -132,34 +147,43 @@ def plot_daily_pulse(gdf):
     """
     days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
     
-    fig, axes = plt.subplots(1, 7, figsize=(24, 6))
+    # 7 张子图画的是同一块地图: 共用坐标轴 (同一套数据坐标变换)，等比例只设一次
+    fig, axes = plt.subplots(1, 7, figsize=(24, 6), sharex=True, sharey=True)
+    axes[0].set_aspect('equal', share=True)
     
     # 统一的颜色：工作=绿色，不工作=灰色
     cmap_active = '#27ae60'
     cmap_inactive = '#ecf0f1'
+
+    # 多边形 -> Path 只转换一次 (7 个子图共用)，每天只换填充色
+    patches = [mpatches.PathPatch(geom_to_path(g)) for g in gdf.geometry]
+
+    # 各区中心点整列算一次 (7 个子图共用)
+    cent = gdf.geometry.centroid
+    gdf = gdf.assign(cx=cent.x, cy=cent.y)
+
+    # 7 天的工作掩码一次算完 (区 x 天)，检查各列是否包含 '✓' 或 'Pickup'
+    vals = gdf[[f'Status_{day}' for day in days]].astype(str).to_numpy().astype(str)
+    active_np = (np.char.find(vals, 'Pickup') >= 0) | (np.char.find(vals, '✓') >= 0)
     
     for i, day in enumerate(days):
         ax = axes[i]
         
         # 准备颜色列
-        # 检查该列是否包含 '✓' 或 'Pickup'
-        col_name = f'Status_{day}'
-        is_active = gdf[col_name].astype(str).str.contains('Pickup') | gdf[col_name].astype(str).str.contains('✓')
+        is_active = active_np[:, i]
         
-        # 绘制背景 (Inactive)
-        gdf[~is_active].plot(ax=ax, color=cmap_inactive, edgecolor='white')
+        # 一个集合画完当天所有区: 工作的绿色，不工作的灰色
+        pc = PatchCollection(patches, edgecolor='white')
+        pc.set_facecolor(np.where(is_active, cmap_active, cmap_inactive))
+        ax.add_collection(pc)
+        ax.autoscale_view()
         
-        # 绘制前景 (Active)
         active_gdf = gdf[is_active]
         if not active_gdf.empty:
-            active_gdf.plot(ax=ax, color=cmap_active, edgecolor='white')
-            
             # 在工作的区域标上名字
-            for _, row in active_gdf.iterrows():
-                try:
-                    cent = row['geometry'].centroid
-                    ax.annotate(row['DISTRICT'], (cent.x, cent.y), ha='center', fontsize=7, color='white', fontweight='bold')
-                except: pass
+            for name, x, y in zip(active_gdf['DISTRICT'], active_gdf['cx'], active_gdf['cy']):
+                if np.isnan(x) or np.isnan(y): continue
+                ax.annotate(name, (x, y), ha='center', fontsize=7, color='white', fontweight='bold')
         
         truck_count = len(active_gdf) # 简单用区域数代表忙碌程度，或者可以用之前算的卡车数
         ax.set_title(f"{day}\n({truck_count} Districts)", fontsize=14, fontweight='bold', color='#2c3e50')
@@ -171,6 +195,11 @@ def plot_daily_pulse(gdf):
     plt.savefig(output_file, dpi=300, bbox_inches='tight')
     print(f"✅ 生成图表 2: {output_file}")
 
+def draw(plot_fn, out, gdf, key):
+    """(子进程里) 画一张图并记下数据哈希"""
+    plot_fn(gdf)
+    mark_drawn(out, key)
+
 # ================= 主程序 =================
 
 if __name__ == "__main__":
@@ -178,11 +207,18 @@ if __name__ == "__main__":
     gdf = load_and_merge_data()
     
     if gdf is not None:
-        # 2. 画老鼠-频率响应图 (证明模型的有效性)
-        plot_rats_vs_frequency(gdf)
+        key = data_key(gdf)
+        jobs = [
+            (plot_rats_vs_frequency, 'Viz_Rich_Rats_Response.png'),  # 2. 老鼠-频率响应图 (证明模型的有效性)
+            (plot_daily_pulse, 'Viz_Rich_Daily_Pulse.png'),          # 3. 每日动态图 (证明排班的均衡性)
+        ]
+        todo = [(fn, out) for fn, out in jobs if not is_up_to_date(out, key, force=FORCE_REDRAW)]
         
-        # 3. 画每日动态图 (证明排班的均衡性)
-        plot_daily_pulse(gdf)
+        # 两张图互不依赖，各开一个进程并行出图 (300 dpi 的 savefig 是大头; 各进程的 Agg 画布互不干扰)
+        if todo:
+            with ProcessPoolExecutor(max_workers=len(todo)) as ex:
+                for f in [ex.submit(draw, fn, out, gdf, key) for fn, out in todo]:
+                    f.result()
         
         print("\n🎉 所有高级可视化已完成！")
         print("  - 图1证明了你不仅仅是在做数学题，而是在解决纽约的老鼠危机。")
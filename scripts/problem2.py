@@ -4,12 +4,15 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 from scipy.stats import pearsonr, spearmanr
+from plot_cache import CACHE_DIR, cache_is_fresh
 
 # ================= 配置区域 =================
 # 你的排班结果
 SOLUTION_FILE = 'problem1_final_solution.csv'
 # 包含收入和人口的原始数据
 DATA_FILE = os.path.join('..', 'extra_data', 'merged_data', 'Manhattan_Data_Current_2023_2025.csv')
+# 融合结果缓存 (Parquet)，任一源文件更新后自动重建
+CACHE_FILE = os.path.join(CACHE_DIR, 'problem2_merged.parquet')
 
 # 绘图风格
 plt.style.use('seaborn-v0_8-whitegrid')
@@ -24,32 +27,33 @@ def load_and_merge():
     if not os.path.exists(SOLUTION_FILE) or not os.path.exists(DATA_FILE):
         print("❌ 文件缺失，请检查路径。")
         return None
+    if cache_is_fresh(CACHE_FILE, (SOLUTION_FILE, DATA_FILE)):
+        print(f"⚡ 命中缓存: {CACHE_FILE}")
+        return pd.read_parquet(CACHE_FILE)
 
     # 1. 加载排班解
     sol_df = pd.read_csv(SOLUTION_FILE)
     
     # 2. 加载社会经济数据
     # 注意：原始数据可能有 CD_ID (101, 102...)，需要转成 MN01 格式
-    raw_df = pd.read_csv(DATA_FILE)
-    
-    # 建立映射字典
-    income_map = {}
-    pop_map = {}
-    rat_map = {}
-    
-    for _, row in raw_df.iterrows():
-        # 处理 ID: 如果是 101 -> MN01
-        try:
-            cd_id = int(row['CD_ID']) if 'CD_ID' in row else int(row.name)
-            dist_id = f"MN{cd_id % 100:02d}"
-            
-            # 获取关键字段 (假设列名如下，根据实际 CSV 调整)
-            # 你的数据里可能有 'Median_Income', 'Population', 'Rat_Complaints'
-            income_map[dist_id] = row.get('Median_Income', 0)
-            pop_map[dist_id] = row.get('Population', 0)
-            rat_map[dist_id] = row.get('Rat_Complaints', 0)
-        except:
-            continue
+    # 只读用得到的列
+    raw_df = pd.read_csv(DATA_FILE, usecols=lambda c: c in ('CD_ID', 'Median_Income', 'Population', 'Rat_Complaints'))
+    
+    # 建立映射字典 (整列计算，不逐行 iterrows)
+    # 处理 ID: 如果是 101 -> MN01；ID 转不成数字的行跳过
+    cd = pd.to_numeric(pd.Series(raw_df['CD_ID'] if 'CD_ID' in raw_df else raw_df.index, index=raw_df.index),
+                       errors='coerce').dropna().astype(int)
+    dist_id = 'MN' + (cd % 100).astype(str).str.zfill(2)
+
+    def col_map(col):
+        # 获取关键字段 (假设列名如下，根据实际 CSV 调整)，缺列记 0
+        vals = raw_df.loc[cd.index, col] if col in raw_df else [0] * len(cd)
+        return dict(zip(dist_id, vals))
+
+    # 你的数据里可能有 'Median_Income', 'Population', 'Rat_Complaints'
+    income_map = col_map('Median_Income')
+    pop_map = col_map('Population')
+    rat_map = col_map('Rat_Complaints')
             
     # 3. 合并到 sol_df
     sol_df['Income'] = sol_df['District'].map(income_map)
@@ -61,6 +65,8 @@ def load_and_merge():
     # 处理缺失值 (用均值填充或模拟，防止报错)
     sol_df['Income'] = sol_df['Income'].fillna(sol_df['Income'].mean())
     
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    sol_df.to_parquet(CACHE_FILE)
     return sol_df
 
 # ================= 2. 核心指标计算 =================
@@ -103,11 +109,10 @@ def calculate_metrics(df):
     return corr_income, corr_rats
 
 def gini_coefficient(x):
-    """计算基尼系数"""
-    diffsum = 0
-    for i, xi in enumerate(x[:-1], 1):
-        diffsum += np.sum(np.abs(xi - x[i:]))
-    return diffsum / (len(x)**2 * np.mean(x))
+    """计算基尼系数 (排序后用闭式 G = 2·Σ i·x_(i) / (n·Σx) - (n+1)/n，O(n log n)，不做两两差)"""
+    x = np.sort(np.asarray(x, dtype=np.float64))
+    n = x.size
+    return 2 * np.sum(np.arange(1, n + 1) * x) / (n * x.sum()) - (n + 1) / n
 
 # ================= 3. 可视化绘图 =================
 
@@ -5,7 +5,7 @@ import numpy as np
 INPUT_FILE = 'extra_data/merged_data/Manhattan_Data_Current_2023_2025.csv'
 
 def load_data_l5(filepath):
-    df = pd.read_csv(filepath)
+    df = pd.read_csv(filepath, usecols=['CD_ID', 'Rat_Complaints', 'Monthly_Trash_Tons'])
     df = df.dropna(subset=['Rat_Complaints', 'Monthly_Trash_Tons', 'CD_ID'])
     return df
 
@@ -20,13 +20,9 @@ def analyze_problem4_rats(df):
     # 计算阈值：前 40% 严重的区域指定为 AM (这通常覆盖了所有的 High Risk)
     rat_threshold = df['Rat_Complaints'].quantile(0.6) # Top 40%
     
-    def assign_shift(row):
-        if row['Rat_Complaints'] >= rat_threshold:
-            return 'AM (Morning)'  # 高鼠患 -> 必须早收
-        else:
-            return 'PM (Evening)'  # 低鼠患 -> 可以晚收
-            
-    df['Assigned_Shift'] = df.apply(assign_shift, axis=1)
+    # 高鼠患 -> 必须早收; 低鼠患 -> 可以晚收 (整列布尔掩码，不逐行 apply)
+    am_mask = (df['Rat_Complaints'] >= rat_threshold).to_numpy()
+    df['Assigned_Shift'] = np.where(am_mask, 'AM (Morning)', 'PM (Evening)')
     
     # --- 3. 评估对老鼠种群的影响 (Effect on Rat Population) [Cite: 26] ---
     # 建立模型指标: Trash-Exposure-Hours (TEH)
@@ -41,13 +37,9 @@ def analyze_problem4_rats(df):
     baseline_teh = (df['Daily_Tons'] * 20.0).sum()
     
     # 计算 Optimized 风险
-    def calc_new_exposure(row):
-        if row['Assigned_Shift'] == 'AM (Morning)':
-            return row['Daily_Tons'] * 11.0 # 暴露时间减半
-        else:
-            return row['Daily_Tons'] * 22.0 # 暴露时间正常
-            
-    optimized_teh = df.apply(calc_new_exposure, axis=1).sum()
+    # AM 暴露时间减半 (11h)，PM 暴露时间正常 (22h)
+    hours = np.where(am_mask, 11.0, 22.0)
+    optimized_teh = (df['Daily_Tons'].to_numpy() * hours).sum()
     
     # 计算改善率
     reduction = baseline_teh - optimized_teh
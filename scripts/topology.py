@@ -0,0 +1,64 @@
+import numpy as np
+from _jit import njit
+
+# ==========================================
+# 曼哈顿 12 个社区的相邻关系 + 位掩码连通块内核 (problem1_solve.py / problem1_visualization.py / problem1_visualization2.py / junheng.py 共用)
+# ==========================================
+REAL_TOPOLOGY = {
+    'MN01': ['MN02', 'MN03'],
+    'MN02': ['MN01', 'MN03', 'MN04'],
+    'MN03': ['MN01', 'MN02', 'MN06'],
+    'MN04': ['MN02', 'MN05', 'MN07'],
+    'MN05': ['MN04', 'MN06', 'MN07'],
+    'MN06': ['MN03', 'MN05', 'MN08'],
+    'MN07': ['MN04', 'MN05', 'MN08', 'MN09'],
+    'MN08': ['MN06', 'MN07', 'MN11'],
+    'MN09': ['MN07', 'MN10', 'MN12'],
+    'MN10': ['MN09', 'MN11', 'MN12'],
+    'MN11': ['MN08', 'MN10', 'MN12'],
+    'MN12': ['MN09', 'MN10', 'MN11']
+}
+
+# 节点编号按 REAL_TOPOLOGY 的顺序; 位掩码约定: 第 i 位为 1 表示第 i 个区
+NODE_INDEX = {name: i for i, name in enumerate(REAL_TOPOLOGY)}
+N_NODES = len(NODE_INDEX)
+
+# 邻接位掩码: ADJ[i] 的第 j 位为 1 表示第 i、j 个区相邻 (12 个区，12 bit 就够)
+ADJ = [sum(1 << NODE_INDEX[nb] for nb in REAL_TOPOLOGY[name]) for name in REAL_TOPOLOGY]
+# 同一份掩码的数组版 (给 NumPy / Numba 内核用; 存 int64 与内核里的 1 << i 同类型，避免混合整型运算)
+ADJ_BITMASK = np.array(ADJ, dtype=np.int64)
+# 无向边表，每行一条边 (i, j)，i < j
+EDGE_LIST = np.array([(i, j) for i in range(N_NODES) for j in range(i + 1, N_NODES) if (ADJ[i] >> j) & 1],
+                     dtype=np.int32)
+
+
+@njit(cache=True)
+def _popcount(x):
+    c = 0
+    while x:
+        x &= x - 1
+        c += 1
+    return c
+
+
+@njit(cache=True)
+def component(seed, active, adj):
+    """从 seed 出发在 active 内反复 OR 邻接掩码 (adj[i] 为第 i 个区的邻接掩码) 直到不再变化，得到 seed 所在连通块"""
+    comp = seed
+    while True:
+        grown = comp
+        m = comp
+        while m:
+            low = m & -m
+            grown |= adj[_popcount(low - 1)] & active
+            m ^= low
+        if grown == comp: return comp
+        comp = grown
+
+
+def components(active):
+    """把活跃区掩码拆成若干连通块掩码 (每次从最低位的区出发)"""
+    while active:
+        comp = component(active & -active, active, ADJ_BITMASK)
+        yield comp
+        active &= ~comp
@@ -1,18 +1,45 @@
 import pandas as pd
 import geopandas as gpd
-from shapely import wkt
+import numpy as np
+import shapely
 import networkx as nx
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import os
+import hashlib
 from networkx.algorithms import community
+from mn_map import parse_wkt
+from plot_cache import CACHE_DIR  # 布局坐标缓存也放项目根目录的 .cache
 
-# --- 辅助函数保持不变 ---
-def safe_wkt_load(wkt_string):
-    try:
-        return wkt.loads(wkt_string)
-    except:
-        return None
+# igraph 可选: 装了就用它的 C 实现做社区检测，没装就用 networkx
+try:
+    import igraph as ig
+except ImportError:
+    ig = None
+
+# --- 辅助函数 ---
+def detect_communities(G):
+    """贪心模块度社区划分 (CNM)。igraph 的 community_fastgreedy 与 networkx 的
+    greedy_modularity_communities 是同一算法；返回按社区大小从大到小排的节点集合列表"""
+    if ig is None:
+        return list(community.greedy_modularity_communities(G))
+    nodes = list(G.nodes())
+    index = {n: i for i, n in enumerate(nodes)}
+    g = ig.Graph(n=len(nodes), edges=[(index[u], index[v]) for u, v in G.edges()])
+    clusters = g.community_fastgreedy().as_clustering()
+    return sorted(({nodes[i] for i in c} for c in clusters), key=len, reverse=True)
+
+def cached_spring_layout(G, **kwargs):
+    """spring_layout 在固定种子下是确定的: 按 (节点顺序, 边顺序, 参数) 哈希缓存坐标，图没变就直接读"""
+    key = hashlib.md5(repr((list(G.nodes()), list(G.edges()), sorted(kwargs.items()))).encode()).hexdigest()
+    cache = os.path.join(CACHE_DIR, f'layout_{key}.npz')
+    if os.path.exists(cache):
+        saved = np.load(cache)
+        return dict(zip(saved['nodes'].tolist(), saved['pos']))
+    pos = nx.spring_layout(G, **kwargs)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    np.savez(cache, nodes=np.array(list(pos)), pos=np.array(list(pos.values())))
+    return pos
 
 def plot_refined_topology():
     # --- 1. 数据读取与处理 (保持不变) ---
@@ -22,10 +49,10 @@ def plot_refined_topology():
         return
 
     print("📂 读取数据...")
-    df = pd.read_csv(csv_file_path, usecols=['DISTRICT', 'SHAPE_Area', 'multipolygon'])
+    df = pd.read_csv(csv_file_path, usecols=['DISTRICT', 'SHAPE_Area', 'multipolygon'], engine='pyarrow')
     df = df[df['DISTRICT'].str.startswith('MN', na=False)].copy()
     
-    df['geometry'] = df['multipolygon'].apply(safe_wkt_load)
+    df['geometry'] = parse_wkt(df['multipolygon'])
     gdf = gpd.GeoDataFrame(df, geometry='geometry').dropna(subset=['geometry'])
     
     gdf['Area_Float'] = gdf['SHAPE_Area'].astype(str).str.replace(',', '').astype(float)
@@ -38,15 +65,20 @@ def plot_refined_topology():
 
     # --- 2. 构建图网络 (保持不变) ---
     G = nx.Graph()
-    for idx, row in gdf.iterrows():
-        G.add_node(row['DISTRICT'], size=row['node_size'])
+    G.add_nodes_from((name, {'size': size}) for name, size in zip(gdf['DISTRICT'], gdf['node_size']))
 
-    gdf['geometry'] = gdf['geometry'].buffer(0)
-    for i, row_i in gdf.iterrows():
-        for j, row_j in gdf.iterrows():
-            if i >= j: continue
-            if row_i['geometry'].distance(row_j['geometry']) < 1e-3:
-                G.add_edge(row_i['DISTRICT'], row_j['DISTRICT'])
+    # 只对无效的多边形做 buffer(0) 修复 (有效的原样用，省掉整列重建几何)
+    geoms = gdf['geometry'].to_numpy().copy()
+    bad = ~shapely.is_valid(geoms)
+    geoms[bad] = shapely.buffer(geoms[bad], 0)
+    # 相邻判定: 两区距离 < 1e-3。先用 STRtree (R 树) 按包围盒筛候选，再做精确距离判断，一次批量查询
+    tree = shapely.STRtree(geoms)
+    left, right = tree.query(geoms, predicate='dwithin', distance=1e-3)
+    keep = left < right
+    left, right = left[keep], right[keep]
+    order = np.lexsort((right, left))  # 保持逐对比较时的加边顺序 (影响社区检测和布局)
+    names = gdf['DISTRICT'].to_numpy()
+    G.add_edges_from(zip(names[left[order]], names[right[order]]))
 
     isolates = list(nx.isolates(G))
     for iso in isolates:
@@ -55,7 +87,7 @@ def plot_refined_topology():
             G.add_edge('MN12', 'MN09')
     
     # --- 3. 社区检测与配色 (解释颜色的来源) ---
-    communities = list(community.greedy_modularity_communities(G))
+    communities = detect_communities(G)
     color_map = {}
     # 选用一套更专业、对比度更强的配色方案
     palette = ['#E63946', '#457B9D', '#F4A261', '#2A9D8F'] 
@@ -66,13 +98,13 @@ def plot_refined_topology():
             color_map[node] = c_color
 
     node_colors = [color_map.get(n, '#CCCCCC') for n in G.nodes()]
-    node_sizes = [G.nodes[n]['size'] for n in G.nodes()]
+    node_sizes = [size for _, size in G.nodes(data='size')]
 
     # --- 4. 布局与绘图 (重点修改) ---
     plt.figure(figsize=(12, 10))
     
     # 布局算法 (固定种子，保证结果一致)
-    pos = nx.spring_layout(G, k=0.5, seed=42, iterations=100)
+    pos = cached_spring_layout(G, k=0.5, seed=42, iterations=100)
     
     # 画边
     nx.draw_networkx_edges(G, pos, width=2, alpha=0.4, edge_color='#888888')
@@ -1,14 +1,15 @@
 import pandas as pd
-import geopandas as gpd
-from shapely import wkt
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # 两张图都只存文件不弹窗，用非交互后端，不加载 GUI 工具包
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import os
 import platform
+from mn_map import MAP_FILE, get_manhattan_gdf, district_ids, plot_by_category
 
 # ================= 1. 基础配置与字体设置 =================
-# 地图数据路径 (请确认你的文件名)
-MAP_FILE = './raw_data/DSNY_Districts_20251130.csv'
+# 地图数据路径和曼哈顿分区几何的加载/缓存见 mn_map.py
 # 分析数据路径 (L5模型输出)
 DATA_FILE = 'extra_data/merged_data/Manhattan_Data_Current_2023_2025.csv'
 
@@ -26,48 +27,30 @@ def configure_chinese_font():
     print("✅ 中文字体配置完成")
 
 # ================= 2. 数据加载函数 (保持逻辑稳健) =================
-def safe_wkt_load(wkt_string):
-    try: return wkt.loads(wkt_string)
-    except: return None
-
 def load_data():
     # 1. 加载地图
     if not os.path.exists(MAP_FILE):
         print(f"❌ 找不到地图文件: {MAP_FILE}")
         return None
     
-    df_map = pd.read_csv(MAP_FILE)
-    # 筛选曼哈顿 (MN开头)
-    df_map = df_map[df_map['DISTRICT'].str.startswith('MN', na=False)].copy()
-    df_map['geometry'] = df_map['multipolygon'].apply(safe_wkt_load)
-    gdf_map = gpd.GeoDataFrame(df_map.dropna(subset=['geometry']), geometry='geometry')
+    gdf_map = get_manhattan_gdf()
     
     # 2. 加载分析数据
     if not os.path.exists(DATA_FILE):
         print(f"❌ 找不到数据文件: {DATA_FILE}")
         return None
         
-    df_data = pd.read_csv(DATA_FILE)
+    df_data = pd.read_csv(DATA_FILE, usecols=['CD_ID', 'Rat_Complaints'])
     
     # 3. 计算 Problem 4 策略 (AM/PM)
     # 逻辑: 鼠患最严重的 Top 40% -> 早班 (AM)
     rat_threshold = df_data['Rat_Complaints'].quantile(0.60)
     
-    def get_shift_label(rats):
-        if rats >= rat_threshold:
-            return '早班 (AM) - 高风险'
-        else:
-            return '晚班 (PM) - 低风险'
-            
-    df_data['Shift_Label'] = df_data['Rat_Complaints'].apply(get_shift_label)
+    is_am = df_data['Rat_Complaints'].to_numpy() >= rat_threshold
+    df_data['Shift_Label'] = np.where(is_am, '早班 (AM) - 高风险', '晚班 (PM) - 低风险')
     
     # 4. 统一 ID 格式 (101 -> MN01) 以便合并
-    def convert_id(cd_id):
-        try:
-            return f"MN{int(cd_id)%100:02d}"
-        except:
-            return str(cd_id)
-    df_data['DISTRICT'] = df_data['CD_ID'].apply(convert_id)
+    df_data['DISTRICT'] = district_ids(df_data['CD_ID'])
     
     # 5. 合并数据
     merged = gdf_map.merge(df_data[['DISTRICT', 'Rat_Complaints', 'Shift_Label']], on='DISTRICT', how='left')
@@ -80,6 +63,11 @@ def plot_charts():
     gdf = load_data()
     if gdf is None: return
 
+    # 各区中心点在加载地图时已算好 (两张图的标注共用)，空几何的中心点为 NaN，不标
+    xs, ys = gdf['cent_x'].to_numpy(), gdf['cent_y'].to_numpy()
+    labels = gdf['DISTRICT'].to_numpy()
+    has_cent = ~(np.isnan(xs) | np.isnan(ys))
+
     # --- 图 1: 鼠患风险热力图 ---
     print("正在绘制图 1: 鼠患热力图...")
     fig1, ax1 = plt.subplots(figsize=(10, 12))
@@ -96,11 +84,9 @@ def plot_charts():
     ax1.axis('off')
     
     # 标注 ID
-    for _, row in gdf.iterrows():
-        if row['geometry']:
-            centroid = row['geometry'].centroid
-            ax1.annotate(text=row['DISTRICT'], xy=(centroid.x, centroid.y), 
-                         ha='center', fontsize=8, color='black', alpha=0.7)
+    for x, y, name in zip(xs[has_cent], ys[has_cent], labels[has_cent]):
+        ax1.annotate(text=name, xy=(x, y), 
+                     ha='center', fontsize=8, color='black', alpha=0.7)
     
     output1 = 'Rat_Risk_Map.png'
     plt.savefig(output1, dpi=300, bbox_inches='tight')
@@ -117,14 +103,16 @@ def plot_charts():
         '晚班 (PM) - 低风险': '#2C3E50'
     }
     
-    # 分类绘图
-    for label, color in color_map.items():
-        subset = gdf[gdf['Shift_Label'] == label]
-        if not subset.empty:
-            subset.plot(ax=ax2, color=color, edgecolor='white', linewidth=1.0)
+    # 早晚班 / 缺失的掩码整列算一次，底图分层和标注字色共用
+    shift = gdf['Shift_Label']
+    is_pm = shift.eq('晚班 (PM) - 低风险').to_numpy(dtype=bool)
+    is_missing = shift.isna().to_numpy()
+
+    # 分类绘图: 按 color_map 的顺序一次画完
+    plot_by_category(gdf, 'Shift_Label', color_map, ax2, edgecolor='white', linewidth=1.0)
             
     # 处理缺失值 (如果有)
-    missing = gdf[gdf['Shift_Label'].isna()]
+    missing = gdf[is_missing]
     if not missing.empty:
         missing.plot(ax=ax2, color='lightgrey', hatch='///', edgecolor='white')
 
@@ -136,13 +124,10 @@ def plot_charts():
     ax2.legend(handles=patches, loc='upper left', fontsize=12, frameon=True, framealpha=0.9)
 
     # 标注 ID (白色字体更清晰)
-    for _, row in gdf.iterrows():
-        if row['geometry']:
-            centroid = row['geometry'].centroid
-            # 晚班区域背景深，用白色字；早班用黑色字
-            text_color = 'white' if '晚班' in str(row['Shift_Label']) else 'black'
-            ax2.annotate(text=row['DISTRICT'], xy=(centroid.x, centroid.y), 
-                         ha='center', fontsize=9, color=text_color, fontweight='bold')
+    # 晚班区域背景深，用白色字；早班用黑色字
+    for x, y, name, pm in zip(xs[has_cent], ys[has_cent], labels[has_cent], is_pm[has_cent]):
+        ax2.annotate(text=name, xy=(x, y), 
+                     ha='center', fontsize=9, color='white' if pm else 'black', fontweight='bold')
 
     output2 = 'Strategy_Shift_Map.png'
     plt.savefig(output2, dpi=300, bbox_inches='tight')
@@ -32,7 +32,7 @@ def load_and_process_data():
             'Rat_Complaints': np.random.normal(100, 40, n) + np.random.normal(1500, 300, n)*0.05
         })
     
-    df = pd.read_csv(DATA_FILE)
+    df = pd.read_csv(DATA_FILE, usecols=['CD_ID', 'Rat_Complaints', 'Monthly_Trash_Tons'])
     df = df.dropna(subset=['Rat_Complaints', 'Monthly_Trash_Tons'])
     return df
 
@@ -52,9 +52,9 @@ def plot_all_charts():
     
     # 标出一些极端点 (Top 3)
     top_rats = df.nlargest(3, 'Rat_Complaints')
-    for _, row in top_rats.iterrows():
-        plt.text(row['Monthly_Trash_Tons'], row['Rat_Complaints'], 
-                 f" CD{int(row['CD_ID'])}", fontsize=9, color='black')
+    for tons, rats, cd in zip(top_rats['Monthly_Trash_Tons'].to_numpy(), top_rats['Rat_Complaints'].to_numpy(),
+                              top_rats['CD_ID'].to_numpy()):
+        plt.text(tons, rats, f" CD{int(cd)}", fontsize=9, color='black')
 
     plt.title('数据验证: 垃圾产量与鼠患投诉的相关性分析', fontsize=16, fontweight='bold')
     plt.xlabel('月均垃圾产量 (吨)', fontsize=12)
@@ -70,19 +70,20 @@ def plot_all_charts():
     # 图 2: 策略成效对比 (Impact Assessment)
     # ---------------------------------------------------------
     # 计算逻辑 (复用之前的 TEH 模型)
-    rat_threshold = df['Rat_Complaints'].quantile(0.60) # Top 40%
-    df['Strategy'] = df['Rat_Complaints'].apply(lambda x: 'AM (早班)' if x >= rat_threshold else 'PM (晚班)')
+    # 鼠患数只排序一次: 分位数阈值和图 3 的帕累托累积都用这份升序数组
+    rats = df['Rat_Complaints'].to_numpy()
+    rats_sorted = np.sort(rats)
+    rat_threshold = np.quantile(rats_sorted, 0.60) # Top 40%
+    is_am = rats >= rat_threshold
+    df['Strategy'] = np.where(is_am, 'AM (早班)', 'PM (晚班)')
     
     # 计算 Baseline (全 PM) vs Optimized (AM/PM) 的暴露指数
     # 假设: 垃圾量 * 暴露小时数
-    df['Daily_Tons'] = df['Monthly_Trash_Tons'] / 30.0
-    baseline_teh = (df['Daily_Tons'] * 22.0).sum() # 假设现状全是晚班(22h暴露)
+    daily_tons = df['Monthly_Trash_Tons'].to_numpy() / 30.0
+    baseline_teh = float(daily_tons.sum() * 22.0) # 假设现状全是晚班(22h暴露)
     
-    # 优化后: 早班11h, 晚班22h
-    optimized_teh = df.apply(
-        lambda row: row['Daily_Tons'] * 11.0 if row['Strategy']=='AM (早班)' else row['Daily_Tons'] * 22.0, 
-        axis=1
-    ).sum()
+    # 优化后: 早班11h, 晚班22h (按早晚班掩码分两段求和，不再逐区乘小时数)
+    optimized_teh = float(daily_tons[is_am].sum() * 11.0 + daily_tons[~is_am].sum() * 22.0)
     
     reduction = (baseline_teh - optimized_teh) / baseline_teh * 100
     
@@ -119,20 +120,19 @@ def plot_all_charts():
     # 图 3: 帕累托累积图 (Pareto - Justification)
     # ---------------------------------------------------------
     # 目的: 证明为什么要选 Top 40% 的区域
-    df_sorted = df.sort_values(by='Rat_Complaints', ascending=False).reset_index(drop=True)
-    df_sorted['Cumulative_Rats'] = df_sorted['Rat_Complaints'].cumsum()
-    df_sorted['Cumulative_Pct'] = df_sorted['Cumulative_Rats'] / df_sorted['Rat_Complaints'].sum() * 100
-    df_sorted['District_Pct'] = (df_sorted.index + 1) / len(df_sorted) * 100
+    cumulative = np.cumsum(rats_sorted[::-1])
+    cumulative_pct = cumulative / cumulative[-1] * 100  # 累积和最后一项就是总数，不再单独求和
+    district_pct = np.arange(1, len(cumulative) + 1) / len(cumulative) * 100
 
     plt.figure(figsize=(10, 6))
     
     # 画线
-    plt.plot(df_sorted['District_Pct'], df_sorted['Cumulative_Pct'], 
+    plt.plot(district_pct, cumulative_pct, 
              color='#8e44ad', linewidth=3, label='鼠患累积占比')
     
     # 画 40% 切割线
     cut_x = 40
-    cut_y = df_sorted[df_sorted['District_Pct'] >= 40]['Cumulative_Pct'].iloc[0]
+    cut_y = cumulative_pct[np.searchsorted(district_pct, cut_x)]  # 第一个 >= 40% 的位置 (district_pct 递增)
     
     plt.axvline(x=cut_x, color='red', linestyle='--', alpha=0.6)
     plt.axhline(y=cut_y, color='red', linestyle='--', alpha=0.6)
@@ -143,8 +143,8 @@ def plot_all_charts():
              color='red', fontsize=11, fontweight='bold')
 
     # 填充颜色
-    plt.fill_between(df_sorted['District_Pct'], 0, df_sorted['Cumulative_Pct'], 
-                     where=(df_sorted['District_Pct'] <= cut_x),
+    plt.fill_between(district_pct, 0, cumulative_pct, 
+                     where=(district_pct <= cut_x),
                      color='#f1c40f', alpha=0.3, label='AM 早班覆盖区 (High Risk)')
     
     plt.title('分级策略依据: 鼠患分布的帕累托效应', fontsize=16, fontweight='bold')
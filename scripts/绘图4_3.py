@@ -1,16 +1,14 @@
 import pandas as pd
-import geopandas as gpd
-from shapely import wkt
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import matplotlib.lines as mlines
 import os
 import platform
+from mn_map import MAP_FILE, get_manhattan_gdf, district_ids, plot_by_category
 import numpy as np
 
 # ================= 1. 基础配置 =================
-MAP_FILE = './raw_data/DSNY_Districts_20251130.csv'
-DATA_FILE = 'extra_data/merged_data/Manhattan_Data_Current_2023_2025.csv'
+DATA_FILE = 'extra_data/merged_data/Manhattan_Data_Current_2023_2025.csv'  # 地图路径及加载见 mn_map.py
 
 def configure_style():
     plt.style.use('default') 
@@ -29,24 +27,14 @@ def load_and_fix_data():
     if not os.path.exists(MAP_FILE): 
         print(f"❌ 地图文件未找到: {MAP_FILE}")
         return None
-    
-    df_map = pd.read_csv(MAP_FILE)
-    df_map = df_map[df_map['DISTRICT'].str.startswith('MN', na=False)].copy()
-    
-    # 容错解析 WKT
-    def safe_wkt(x):
-        try: return wkt.loads(x)
-        except: return None
-        
-    df_map['geometry'] = df_map['multipolygon'].apply(safe_wkt)
-    gdf = gpd.GeoDataFrame(df_map.dropna(subset=['geometry']), geometry='geometry')
+    gdf = get_manhattan_gdf()
     
     # B. 加载数据
     if not os.path.exists(DATA_FILE): 
         print(f"❌ 数据文件未找到: {DATA_FILE}")
         return None
         
-    df_data = pd.read_csv(DATA_FILE)
+    df_data = pd.read_csv(DATA_FILE, usecols=['CD_ID', 'Rat_Complaints', 'Monthly_Trash_Tons'])
     df_data = df_data.dropna(subset=['Rat_Complaints', 'Monthly_Trash_Tons'])
     
     # C. 计算策略 (AM/PM)
@@ -54,9 +42,7 @@ def load_and_fix_data():
     
     # 使用布尔逻辑避免字符串错误
     df_data['Is_AM'] = df_data['Rat_Complaints'] >= rat_threshold
-    df_data['Strategy_Label'] = df_data['Is_AM'].apply(
-        lambda x: 'AM Strategy (Morning)' if x else 'PM Strategy (Evening)'
-    )
+    df_data['Strategy_Label'] = np.where(df_data['Is_AM'], 'AM Strategy (Morning)', 'PM Strategy (Evening)')
     
     # D. 计算风险影响 (Impact Stats)
     daily_tons = df_data['Monthly_Trash_Tons'] / 30.0
@@ -71,15 +57,9 @@ def load_and_fix_data():
 
     # E. 合并
     # 统一 ID 格式 MN01
-    def clean_id(x):
-        try: return f"MN{int(x)%100:02d}"
-        except: return str(x)
-        
-    df_data['DISTRICT'] = df_data['CD_ID'].apply(clean_id)
+    df_data['DISTRICT'] = district_ids(df_data['CD_ID'])
     merged = gdf.merge(df_data, on='DISTRICT', how='left')
-    
-    # 计算中心点
-    merged['centroid'] = merged.geometry.centroid
+    # 中心点 (cent_x / cent_y) 在加载地图时已算好，随合并带过来
     
     return merged, impact_stats
 
@@ -92,7 +72,7 @@ def draw_dashboard_fixed_v2():
     gdf, (base_risk, opt_risk) = data
     
     # 创建画布
-    fig = plt.figure(figsize=(12, 10), dpi=300) # 尺寸稍微改小一点点防止内存压力
+    fig = plt.figure(figsize=(12, 10)) # 尺寸稍微改小一点点防止内存压力; 画布按默认 dpi 建，只在 savefig 时按 300 dpi 渲染一次
     ax = fig.add_subplot(111)
     fig.patch.set_facecolor('white')
     
@@ -100,15 +80,9 @@ def draw_dashboard_fixed_v2():
     color_am = '#F4D03F' # 亮金
     color_pm = '#2E4053' # 深岩灰蓝
     
-    # 绘制 PM
-    pm_zone = gdf[gdf['Strategy_Label'] == 'PM Strategy (Evening)']
-    if not pm_zone.empty:
-        pm_zone.plot(ax=ax, color=color_pm, edgecolor='white', linewidth=0.8, alpha=0.95)
-        
-    # 绘制 AM
-    am_zone = gdf[gdf['Strategy_Label'] == 'AM Strategy (Morning)']
-    if not am_zone.empty:
-        am_zone.plot(ax=ax, color=color_am, edgecolor='white', linewidth=0.8, alpha=0.95)
+    # 先 PM 后 AM，一次画完
+    zone_colors = {'PM Strategy (Evening)': color_pm, 'AM Strategy (Morning)': color_am}
+    plot_by_category(gdf, 'Strategy_Label', zone_colors, ax, edgecolor='white', linewidth=0.8, alpha=0.95)
     
     # --- Layer 2: 气泡 ---
     max_rats = gdf['Rat_Complaints'].max()
@@ -117,8 +91,8 @@ def draw_dashboard_fixed_v2():
     # 需要把数值映射到合适的 s 大小，比如 50~500
     gdf['bubble_size'] = gdf['Rat_Complaints'] / max_rats * 1000
     
-    x = gdf['centroid'].x
-    y = gdf['centroid'].y
+    x = gdf['cent_x'].to_numpy()
+    y = gdf['cent_y'].to_numpy()
     
     # 白底光晕
     ax.scatter(x, y, s=gdf['bubble_size'] + 60, c='white', alpha=0.8, zorder=9)
@@ -0,0 +1,33 @@
+import functools
+import hashlib
+import os
+
+import pandas as pd
+
+# ==========================================
+# Q1 导出表的读取与出图设置 (solve2.py ~ solve5.py 共用，路径相对项目根目录)
+# ==========================================
+# Parquet 快照目录: 项目根目录的 .cache (首次读某个 CSV 时生成 <文件名>-<绝对路径哈希>.parquet，同名的不同文件互不干扰)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+# 出图分辨率: 默认 300 (报告用图)，调参时可设环境变量 PLOT_DPI=120 快速出草图
+SAVE_DPI = int(os.environ.get('PLOT_DPI', '300'))
+
+
+@functools.lru_cache(maxsize=4)
+def _load_solution(path, mtime):
+    """每个 CSV 有自己的快照; 快照不比 CSV 旧就直接读快照，否则解析 CSV 并刷新快照 (快照内容与解析 CSV 的结果逐位一致)"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.md5(path.encode()).hexdigest()[:12]
+    snapshot = os.path.join(CACHE_DIR, f'{stem}-{digest}.parquet')
+    if os.path.exists(snapshot) and os.path.getmtime(snapshot) >= mtime:
+        return pd.read_parquet(snapshot)
+    df = pd.read_csv(path)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    df.to_parquet(snapshot, index=False)
+    return df
+
+
+def read_solution(path):
+    """读 Q1 导出表。同一进程里按 (绝对路径, 修改时间) 记住结果，CSV 改了自动重读; 返回副本，调用方可以随意加列"""
+    path = os.path.abspath(path)
+    return _load_solution(path, os.path.getmtime(path)).copy()
@@ -1,5 +1,11 @@
 import pandas as pd
 import numpy as np
+import os
+import sys
+
+# Numba 可选的 njit 与 scripts/ 下的脚本共用一份 (scripts/_jit.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from _jit import njit
 
 # ================= 1. 配置参数与约束 (L5 模型) =================
 # 注意：请根据你的实际路径调整 INPUT_FILE
@@ -17,6 +23,12 @@ POOLS = {
     'Midtown': [104, 105, 106, 107],
     'Uptown': [108, 109, 110, 111, 112]
 }
+# 反查表: 区号 -> 所属池
+CD_TO_POOL = {cd: pool_name for pool_name, districts in POOLS.items() for cd in districts}
+
+# 候选周排班模式 (6 个工作日的下标)，一行一个模式
+PAT3 = np.array([[0, 2, 4], [1, 3, 5]], dtype=np.int64)   # 一周 3 次
+PAT2 = np.array([[0, 3], [1, 4], [2, 5]], dtype=np.int64)  # 一周 2 次
 
 
 # ================= 2. 核心函数 (已修改以适应 L5 约束) =================
@@ -27,73 +39,65 @@ def load_and_prep_data(filepath):
 
     # 频率决策 (策略核心)
     rat_threshold = df['Rat_Complaints'].median()
-    df['Freq'] = df['Rat_Complaints'].apply(lambda x: 3 if x > rat_threshold else 2)
+    df['Freq'] = np.where(df['Rat_Complaints'].to_numpy() > rat_threshold, 3, 2)
 
     # Tons per Pickup Day
     df['Tons_Per_Pickup'] = df['Monthly_Trash_Tons'] / 4.33 / df['Freq']
 
-    # 添加区域划分 (L5 拓扑约束)
-    def get_pool(cd_id):
-        cd = int(cd_id)
-        for pool_name, districts in POOLS.items():
-            if cd in districts:
-                return pool_name
-        return 'Other'
-
-    df['Pool'] = df['CD_ID'].apply(get_pool)
+    # 添加区域划分 (L5 拓扑约束)，不在任何池里的记为 Other
+    df['Pool'] = df['CD_ID'].astype(int).map(CD_TO_POOL).fillna('Other')
     return df
 
 
-def optimize_schedule_sub(df_subset):
+@njit(cache=True)
+def _schedule(loads, freqs):
     """
-    对一个数据子集 (可以是全局或局部池) 进行排班优化，找出最大负荷。
-    这个函数是从你的 optimize_schedule 修改而来，现在用于局部和全局计算。
+    贪心排班内核: loads / freqs 已按单次运量从大到小排好。
+    每个区在候选模式 (一周 3 次用 PAT3，否则 PAT2) 里挑"加上后峰值最小"的一个，返回 6 天中的最大日负荷。
+    各模式的峰值按模式表整行 gather 后取 max，再 argmin 选模式 (同峰值取靠前的)，不逐个模式比较分支
     """
     daily_loads = np.zeros(6)
-    sorted_districts = df_subset.sort_values(by='Tons_Per_Pickup', ascending=False)
-
-    for _, row in sorted_districts.iterrows():
-        load = row['Tons_Per_Pickup']
-        freq = row['Freq']
+    for i in range(loads.shape[0]):
+        load = loads[i]
+        pats = PAT3 if freqs[i] == 3 else PAT2
+        peaks = np.empty(pats.shape[0])
+        for k in range(pats.shape[0]):
+            peaks[k] = daily_loads[pats[k]].max() + load
+        daily_loads[pats[np.argmin(peaks)]] += load
 
-        best_pattern = None
-        min_peak_load = float('inf')
+    return daily_loads.max()
 
-        if freq == 3:
-            options = [[0, 2, 4], [1, 3, 5]]
-        else:
-            options = [[0, 3], [1, 4], [2, 5]]
 
-        for pattern in options:
-            current_peak = max(daily_loads[day] + load for day in pattern)
-            if current_peak < min_peak_load:
-                min_peak_load = current_peak
-                best_pattern = pattern
-
-        if best_pattern is not None:
-            for day in best_pattern:
-                daily_loads[day] += load
-
-    return max(daily_loads)
+def optimize_schedule_sub(df_subset, presorted=False):
+    """
+    对一个数据子集 (可以是全局或局部池) 进行排班优化，找出最大负荷。
+    这个函数是从你的 optimize_schedule 修改而来，现在用于局部和全局计算。
+    presorted=True 表示子集已按单次运量从大到小排好 (从排好序的全表里取出的子集顺序不变)，不再重排。
+    """
+    sorted_districts = df_subset if presorted else df_subset.sort_values(by='Tons_Per_Pickup', ascending=False)
+    return _schedule(sorted_districts['Tons_Per_Pickup'].to_numpy(dtype=np.float64),
+                     sorted_districts['Freq'].to_numpy(dtype=np.int64))
 
 
 # ================= 3. 主程序运行与对比输出 =================
 if __name__ == "__main__":
 
     df = load_and_prep_data(INPUT_FILE)
+    # 全表按单次运量排一次序，全局和各池的排班都直接用 (groupby 不打乱组内行序)
+    df_sorted = df.sort_values(by='Tons_Per_Pickup', ascending=False, kind='mergesort')
 
     # --- A. L4 模型：理想效率上限 (全局共享) ---
-    global_max_load = optimize_schedule_sub(df)
+    global_max_load = optimize_schedule_sub(df_sorted, presorted=True)
     fleet_global_l4 = np.ceil(global_max_load / DAILY_CAPACITY)
 
     # --- B. L5 模型：现实拓扑约束下的解 ---
     total_fleet_l5 = 0
     pool_data = {}
 
-    for pool_name, group in df.groupby('Pool'):
+    for pool_name, group in df_sorted.groupby('Pool'):
         if pool_name == 'Other': continue
 
-        max_load_pool = optimize_schedule_sub(group)
+        max_load_pool = optimize_schedule_sub(group, presorted=True)
         fleet_needed = np.ceil(max_load_pool / DAILY_CAPACITY)
 
         total_fleet_l5 += fleet_needed
@@ -119,9 +123,8 @@ if __name__ == "__main__":
     print("=======================================================")
 
     # ================= 4. 导出 Q2 所需数据 =================
-    # 构建要传给 Q2 的数据表
-    output_df = df[
-        ['CD_ID', 'DISTRICT', 'Freq', 'Tons_Per_Pickup', 'Rat_Complaints', 'Median_Income', 'Population']].copy()
+    # 构建要传给 Q2 的数据表 (直接按列名写出，不先拷一份子表)
     # 这里的 'Freq' 必须是你优化后的频率（高频区是3，低频区是2）
-    output_df.to_csv('try/data/problem1_final_solution.csv', index=False)
+    df.to_csv('try/data/problem1_final_solution.csv', index=False,
+              columns=['CD_ID', 'DISTRICT', 'Freq', 'Tons_Per_Pickup', 'Rat_Complaints', 'Median_Income', 'Population'])
     print("✅ 已导出 Q2 所需数据: problem1_final_solution.csv")
\ No newline at end of file
@@ -1,9 +1,10 @@
-import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy.stats import pearsonr
 import os
+from q1_data import SAVE_DPI, read_solution
 
 # ================= 配置区域 =================
 SOLUTION_FILE = 'try/data/problem1_final_solution.csv'
@@ -22,7 +23,7 @@ def load_data():
         print(f"❌ 找不到文件 {SOLUTION_FILE}，请先运行 Q1 代码生成它！")
         return None
 
-    df = pd.read_csv(SOLUTION_FILE)
+    df = read_solution(SOLUTION_FILE)
 
     # 你的数据样例：CD_ID,DISTRICT,Freq,Tons_Per_Pickup,Rat_Complaints,Median_Income,Population
     # 检查必需列
@@ -42,21 +43,25 @@ def calculate_metrics(df):
     # --- A. 效率指标 (Effectiveness) ---
     # 之前代码用了 Monthly_Trash_Tons，现在我们用 Tons_Per_Pickup * Freq 反推
     # 逻辑：每周总运量 = Σ(单次量 * 每周频次)
-    total_weekly_trash = (df['Tons_Per_Pickup'] * df['Freq']).sum()
-    total_weekly_visits = df['Freq'].sum()
+    freq = df['Freq'].to_numpy()
+    total_weekly_trash = float(df['Tons_Per_Pickup'].to_numpy() @ freq)  # 一次点积，不建中间列
+    total_weekly_visits = freq.sum()
 
     efficiency_score = total_weekly_trash / total_weekly_visits
 
     # --- B. 公平性指标 (Equity) ---
+    # Pearson r = 中心化单位向量的点积; 频次列只标准化一次，两个相关系数共用 (这里不需要 p 值)
+    freq_unit = _norm(freq)
+
     # 1. 收入偏见 (Income Correlation) -> 负相关最好
-    corr_income, p_income = pearsonr(df['Median_Income'], df['Freq'])
+    corr_income = float(_norm(df['Median_Income'].to_numpy()) @ freq_unit)
 
     # 2. 需求响应度 (Rat Correlation) -> 正相关最好
-    corr_rats, p_rats = pearsonr(df['Rat_Complaints'], df['Freq'])
+    corr_rats = float(_norm(df['Rat_Complaints'].to_numpy()) @ freq_unit)
 
     # 3. 基尼系数 (Gini Index)
-    df['Service_Per_Capita'] = df['Freq'] / df['Population']
-    gini = gini_coefficient(df['Service_Per_Capita'].values)
+    # 人均服务次数只用来算基尼系数，不再挂到 df 上
+    gini = gini_coefficient(freq / df['Population'].to_numpy())
 
     # --- C. 成本指标 (基于 L5 142辆) ---
     FLEET_SIZE_L5 = 142
@@ -72,11 +77,18 @@ def calculate_metrics(df):
     return corr_income, corr_rats, efficiency_score
 
 
+def _norm(v):
+    """减去均值再除以模长: 两列这样处理后的点积就是它们的 Pearson 相关系数"""
+    v = np.asarray(v, dtype=np.float64)
+    v = v - v.mean()
+    return v / np.linalg.norm(v)
+
+
 def gini_coefficient(x):
-    diffsum = 0
-    for i, xi in enumerate(x[:-1], 1):
-        diffsum += np.sum(np.abs(xi - x[i:]))
-    return diffsum / (len(x) ** 2 * np.mean(x))
+    """计算基尼系数 (排序后用闭式 G = 2·Σ i·x_(i) / (n·Σx) - (n+1)/n，O(n log n)，不做两两差)"""
+    x = np.sort(np.asarray(x, dtype=np.float64))
+    n = x.size
+    return 2 * np.sum(np.arange(1, n + 1) * x) / (n * x.sum()) - (n + 1) / n
 
 
 # ================= 3. 可视化绘图 =================
@@ -85,19 +97,25 @@ def plot_equity_scatter(df, corr_inc):
     """图1: 收入 vs 频率"""
     plt.figure(figsize=(10, 6))
 
+    # 三列各取一次 ndarray，下面散点、颜色、趋势线都直接用
+    inc = df['Median_Income'].to_numpy()
+    freq = df['Freq'].to_numpy()
+    rats = df['Rat_Complaints'].to_numpy()
+
     # 这里的 Rat_Complaints 可能是数千，除以 100 让点大小合适
-    sizes = df['Rat_Complaints'] / df['Rat_Complaints'].max() * 500
+    sizes = rats / rats.max() * 500
 
-    scatter = plt.scatter(df['Median_Income'], df['Freq'],
+    scatter = plt.scatter(inc, freq,
                           s=sizes,
-                          c=df['Rat_Complaints'],
+                          c=rats,
                           cmap='Reds', alpha=0.8, edgecolors='k')
 
     # 趋势线
     if len(df) > 1:
-        z = np.polyfit(df['Median_Income'], df['Freq'], 1)
-        p = np.poly1d(z)
-        plt.plot(df['Median_Income'], p(df['Median_Income']), "b--", alpha=0.6, label=f'Trend (r={corr_inc:.2f})')
+        # 一元最小二乘的斜率就是 r·σy/σx，直接用算好的相关系数，不再做一次 polyfit
+        slope = corr_inc * freq.std() / inc.std()
+        intercept = freq.mean() - slope * inc.mean()
+        plt.plot(inc, slope * inc + intercept, "b--", alpha=0.6, label=f'Trend (r={corr_inc:.2f})')
 
     plt.colorbar(scatter, label='Rat Complaints Intensity')
     plt.xlabel('Median Household Income ($)')
@@ -106,7 +124,8 @@ def plot_equity_scatter(df, corr_inc):
     plt.legend()
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
-    plt.savefig('try/image/Viz_Q2_Equity_Income.png', dpi=300)
+    plt.savefig('try/image/Viz_Q2_Equity_Income.png', dpi=SAVE_DPI)
+    plt.close()
     print("📊 图表已保存: Viz_Q2_Equity_Income.png")
 
 
@@ -143,7 +162,8 @@ def plot_tradeoff_concept(corr_income):
     plt.legend(loc='lower right')
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
-    plt.savefig('try/image/Viz_Q2_Tradeoff.png', dpi=300)
+    plt.savefig('try/image/Viz_Q2_Tradeoff.png', dpi=SAVE_DPI)
+    plt.close()
     print("📊 图表已保存: Viz_Q2_Tradeoff.png")
 
 
@@ -1,8 +1,10 @@
-import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+from q1_data import SAVE_DPI, read_solution
 
 # ================= 配置 =================
 SOLUTION_FILE = 'try/data/problem1_final_solution.csv'
@@ -16,13 +18,13 @@ def load_data():
     if not os.path.exists(SOLUTION_FILE):
         print("请先运行 Q1 代码生成数据！")
         return None
-    return pd.read_csv(SOLUTION_FILE)
+    return read_solution(SOLUTION_FILE)
 
 
 # ================= 2. 压力测试引擎 =================
 def stress_test(df, failure_rate=0.0, load_spike=0.0, weather_impact=0.0):
     """
-    模拟一天的运营状况
+    模拟一天的运营状况 (参数可以是标量，也可以是可广播的数组，一次算出整张场景表)
     :param failure_rate: 车辆故障率 (0.0 - 0.5)
     :param load_spike: 垃圾激增比例 (0.0 - 0.5)
     :param weather_impact: 天气导致的额外效率损失 (0.0 - 0.5)
@@ -30,7 +32,7 @@ def stress_test(df, failure_rate=0.0, load_spike=0.0, weather_impact=0.0):
     """
     # 1. 供给侧冲击 (Supply Shock)
     # 实际可用车辆
-    available_trucks = int(FLEET_SIZE * (1 - failure_rate))
+    available_trucks = np.trunc(FLEET_SIZE * (1 - np.asarray(failure_rate)))  # 不足一辆的不算
     # 实际单车运力 (受天气影响)
     # 基础模型已经扣了0.2，天气会再扣
     current_efficiency = (1 - 0.2) * (1 - weather_impact)
@@ -42,11 +44,11 @@ def stress_test(df, failure_rate=0.0, load_spike=0.0, weather_impact=0.0):
     # 假设今天是负荷最大的一天 (Worst Case from Q1)
     # Q1算出最大负荷约 2161.5 吨。我们用这个基准加 spikes
     base_load = 2161.5
-    total_load = base_load * (1 + load_spike)
+    total_load = base_load * (1 + np.asarray(load_spike))
 
     # 3. 结果计算
-    uncollected = max(0, total_load - total_capacity)
-    success_rate = min(1.0, total_capacity / total_load)
+    uncollected = np.maximum(0, total_load - total_capacity)
+    success_rate = np.minimum(1.0, total_capacity / total_load)
 
     return success_rate, uncollected
 
@@ -55,10 +57,10 @@ def stress_test(df, failure_rate=0.0, load_spike=0.0, weather_impact=0.0):
 def adaptive_strategy_test(df, load_spike):
     """
     模拟：如果不加车，而是开启 '加班模式' (Overtime, R=2.5 trips/day)
-    能否扛住垃圾激增？
+    能否扛住垃圾激增？ (load_spike 可以是数组，返回对应的布尔数组)
     """
     base_load = 2161.5
-    total_load = base_load * (1 + load_spike)
+    total_load = base_load * (1 + np.asarray(load_spike))
 
     # 标准模式 (2 trips, 20% loss) -> 19.2 tons/truck
     cap_std = FLEET_SIZE * 19.2
@@ -69,6 +71,12 @@ def adaptive_strategy_test(df, load_spike):
     return (cap_std >= total_load), (cap_ot >= total_load)
 
 
+def first_failure(spike_range, ok, default=0.5):
+    """第一个扛不住 (ok 为 False) 的激增率: argmax 一次找到第一个 False，全都扛得住返回 default"""
+    idx = np.argmax(~ok)
+    return spike_range[idx] if not ok[idx] else default
+
+
 # ================= 4. 绘图与分析 =================
 def run_analysis(df):
     print("=== Q3: 鲁棒性与中断场景分析 ===")
@@ -80,12 +88,8 @@ def run_analysis(df):
     failures = np.linspace(0, 0.3, 10)  # 0% 到 30% 故障
     spikes = np.linspace(0, 0.3, 10)  # 0% 到 30% 激增
 
-    heatmap_data = np.zeros((10, 10))
-
-    for i, f in enumerate(failures):
-        for j, s in enumerate(spikes):
-            rate, _ = stress_test(df, failure_rate=f, load_spike=s)
-            heatmap_data[j, i] = rate  # 注意行列对应
+    # 整张表一次广播算完: 行 = 激增率, 列 = 故障率 (注意行列对应)
+    heatmap_data, _ = stress_test(df, failure_rate=failures[None, :], load_spike=spikes[:, None])
 
     # 绘图 1: 热力图
     plt.figure(figsize=(10, 8))
@@ -98,22 +102,19 @@ def run_analysis(df):
     plt.ylabel('Waste Spike Rate')
     plt.title('Robustness Heatmap: Service Level under Stress')
     plt.tight_layout()
-    plt.savefig('try/image/Viz_Q3_Robustness_Heatmap.png', dpi=300)
+    plt.savefig('try/image/Viz_Q3_Robustness_Heatmap.png', dpi=SAVE_DPI)
+    plt.close()
     print("📊 鲁棒性热力图已保存: Viz_Q3_Robustness_Heatmap.png")
 
     # --- 场景 B: 极端天气适应性 (加班策略) ---
     spike_range = np.linspace(0, 0.5, 50)  # 0% 到 50% 激增
-    std_res = []
-    ot_res = []
-
-    for s in spike_range:
-        std_ok, ot_ok = adaptive_strategy_test(df, s)
-        std_res.append(1 if std_ok else 0)  # 1=Survive, 0=Fail
-        ot_res.append(1 if ot_ok else 0)
+    std_ok, ot_ok = adaptive_strategy_test(df, spike_range)
+    std_res = std_ok.astype(int)  # 1=Survive, 0=Fail
+    ot_res = ot_ok.astype(int)
 
-    # 找到崩溃临界点
-    limit_std = next((s for s, ok in zip(spike_range, std_res) if ok == 0), 0.5)
-    limit_ot = next((s for s, ok in zip(spike_range, ot_res) if ok == 0), 0.5)
+    # 找到崩溃临界点 (第一个扛不住的激增率，全都扛得住就记 50%)
+    limit_std = first_failure(spike_range, std_ok)
+    limit_ot = first_failure(spike_range, ot_ok)
 
     print(f"\n[压力测试结论]")
     print(f"1. 标准模式 (Standard) 崩溃阈值: 垃圾激增 > {limit_std:.1%}")
@@ -134,7 +135,8 @@ def run_analysis(df):
     plt.title('Adaptation Strategy: Extending Limits with Overtime')
     plt.legend()
     plt.tight_layout()
-    plt.savefig('try/image/Viz_Q3_Adaptation.png', dpi=300)
+    plt.savefig('try/image/Viz_Q3_Adaptation.png', dpi=SAVE_DPI)
+    plt.close()
     print("📊 适应性分析图已保存: Viz_Q3_Adaptation.png")
 
 
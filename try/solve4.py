@@ -1,9 +1,12 @@
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy.stats import pearsonr
 import os
+from q1_data import SAVE_DPI, read_solution
 
 # ================= 配置 =================
 INPUT_FILE = 'try/data/problem1_final_solution.csv'
@@ -19,7 +22,7 @@ RAT_REDUCTION_ELASTICITY = 0.5  # 弹性系数
 # ================= 1. 数据加载 (修复版) =================
 def load_data():
     if os.path.exists(INPUT_FILE):
-        df = pd.read_csv(INPUT_FILE)
+        df = read_solution(INPUT_FILE)
         print(f"正在读取 {INPUT_FILE}...")
 
         # --- 关键修复：反推 Monthly_Trash_Tons ---
@@ -63,15 +66,16 @@ def analyze_correlation(df):
 
     # 标注点
     if 'CD_ID' in df.columns:
-        for i, row in df.iterrows():
-            plt.text(row[x_col], row[y_col], f"MN{int(row['CD_ID']) % 100:02d}", fontsize=9)
+        for x, y, cd in zip(df[x_col].to_numpy(), df[y_col].to_numpy(), df['CD_ID'].to_numpy()):
+            plt.text(x, y, f"MN{int(cd) % 100:02d}", fontsize=9)
 
     plt.title(f'Investigating the Source: Trash vs Rats ({label})', fontsize=14)
     plt.xlabel(f'Trash Generation ({label})')
     plt.ylabel(f'Rat Complaints ({label})')
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
-    plt.savefig('try/image/Viz_Q4_Correlation.png', dpi=300)
+    plt.savefig('try/image/Viz_Q4_Correlation.png', dpi=SAVE_DPI)
+    plt.close()
     print("📊 相关性图已保存: Viz_Q4_Correlation.png")
 
     return corr
@@ -84,13 +88,10 @@ def assign_pickup_schedule(df):
     # 策略：鼠患高于中位数的区域 -> Evening Pickup
     threshold = df['Rat_Complaints'].median()
 
-    def get_time_slot(rats):
-        if rats > threshold:
-            return 'Evening', HOURS_EVENING  # 4小时暴露
-        else:
-            return 'Morning', HOURS_MORNING  # 12小时暴露
-
-    df[['Pickup_Time', 'Exposure_Hours']] = df['Rat_Complaints'].apply(lambda x: pd.Series(get_time_slot(x)))
+    # 高于中位数 -> Evening (4小时暴露)，否则 Morning (12小时暴露)；整列 np.where，不逐行拼 Series
+    is_evening = df['Rat_Complaints'].to_numpy() > threshold
+    df['Pickup_Time'] = np.where(is_evening, 'Evening', 'Morning')
+    df['Exposure_Hours'] = np.where(is_evening, HOURS_EVENING, HOURS_MORNING)
 
     print("调度分配结果:")
     print(df['Pickup_Time'].value_counts())
@@ -134,15 +135,16 @@ def predict_rat_reduction(df):
     plt.bar(x + width / 2, df_sorted['Predicted_Rats'], width, label='Predicted (After Strategy)', color='green',
             alpha=0.8)
 
-    # 标记改成 Evening 的区
-    evening_indices = [i for i, time in enumerate(df_sorted['Pickup_Time']) if time == 'Evening']
+    # 标记改成 Evening 的区 (整列比较取下标，不逐行判断)
+    evening_indices = np.flatnonzero(df_sorted['Pickup_Time'].to_numpy() == 'Evening')
     # 只在这些柱子上画标记
-    if evening_indices:
-        plt.plot(evening_indices, [df_sorted['Rat_Complaints'].iloc[i] + 50 for i in evening_indices],
+    if evening_indices.size:
+        plt.plot(evening_indices, df_sorted['Rat_Complaints'].to_numpy()[evening_indices] + 50,
                  'v', color='orange', markersize=10, label='Switched to Evening Pickup', linestyle='None')
 
     # 处理 X 轴标签
-    labels = [f"MN{int(cd) % 100:02d}" for cd in df_sorted['CD_ID']] if 'CD_ID' in df.columns else df_sorted.index
+    labels = ('MN' + (df_sorted['CD_ID'].astype(int) % 100).astype(str).str.zfill(2)).to_numpy() \
+        if 'CD_ID' in df.columns else df_sorted.index
     plt.xticks(x, labels, rotation=45)
 
     plt.xlabel('Sanitation District')
@@ -151,7 +153,8 @@ def predict_rat_reduction(df):
     plt.legend()
     plt.grid(axis='y', linestyle='--', alpha=0.3)
     plt.tight_layout()
-    plt.savefig('try/image/Viz_Q4_Impact_Prediction.png', dpi=300)
+    plt.savefig('try/image/Viz_Q4_Impact_Prediction.png', dpi=SAVE_DPI)
+    plt.close()
     print("📊 预测对比图已保存: Viz_Q4_Impact_Prediction.png")
 
     return df
@@ -1,8 +1,11 @@
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+from q1_data import SAVE_DPI, read_solution
 
 # ================= 配置 =================
 SOLUTION_FILE = 'try/data/problem1_final_solution.csv'
@@ -37,20 +40,16 @@ def load_data_robust():
         print(f"❌ 文件 {SOLUTION_FILE} 不存在")
         return None
 
-    df = pd.read_csv(SOLUTION_FILE)
+    df = read_solution(SOLUTION_FILE)
     df.columns = [c.strip() for c in df.columns]
 
     # 自动修复 CD_ID
     if 'CD_ID' not in df.columns:
         dist_col = next((c for c in df.columns if c.lower() == 'district'), None)
         if dist_col:
-            def extract_id(d_str):
-                try:
-                    return int('1' + str(d_str).replace('MN', '').zfill(2))
-                except:
-                    return 0
-
-            df['CD_ID'] = df[dist_col].apply(extract_id)
+            # MN01 -> 101 (整列字符串运算; 拼出来不是纯数字的记为 0)
+            ids = '1' + df[dist_col].astype(str).str.replace('MN', '').str.zfill(2)
+            df['CD_ID'] = pd.to_numeric(ids.where(ids.str.fullmatch(r'\d+'))).fillna(0).astype(int)
 
     # 自动修复 Monthly_Trash_Tons
     if 'Monthly_Trash_Tons' not in df.columns:
@@ -111,7 +110,8 @@ def run_analysis():
     plt.ylabel('Trucks Needed')
     plt.grid(axis='y', alpha=0.3)
 
-    plt.savefig('try/image/Viz_Q5_RealData_Impact.png', dpi=300)
+    plt.savefig('try/image/Viz_Q5_RealData_Impact.png', dpi=SAVE_DPI)
+    plt.close()
     print("📊 结果图已保存: Viz_Q5_RealData_Impact.png")
 
     df.to_csv('try/data/problem5_real_data_result.csv', index=False)
@@ -1,13 +1,15 @@
 import pandas as pd
+import numpy as np
 
 
 def calculate_real_ratios(csv_path):
     print(f"正在读取 {csv_path} ...")
     # 读取 PLUTO 数据 (可能很大，只读关键列)
     # 关键列推测: 'CD' (Community District), 'UnitsRes' (Residential Units)
+    # pyarrow 引擎多线程解析，只解码这两列; 列名不对时它抛 KeyError (C 引擎是 ValueError)
     try:
-        df = pd.read_csv(csv_path, usecols=['CD', 'UnitsRes'])
-    except ValueError:
+        df = pd.read_csv(csv_path, usecols=['CD', 'UnitsRes'], engine='pyarrow')
+    except (ValueError, KeyError):
         # 如果列名不对，尝试读取前几行看看
         df = pd.read_csv(csv_path, nrows=5)
         print("列名列表:", df.columns.tolist())
@@ -18,15 +20,20 @@ def calculate_real_ratios(csv_path):
     # 过滤曼哈顿的数据 (CD 以 1 开头，如 101, 102)
     # 你的 MN.csv 可能已经是曼哈顿的了，但还是保险起见
     df['CD'] = pd.to_numeric(df['CD'], errors='coerce')
-    manhattan_df = df[(df['CD'] >= 101) & (df['CD'] <= 112)].copy()
+    manhattan_df = df[df['CD'].between(101, 112)]
 
     # 定义 "Bin-Compatible" (可以用桶的小楼): 1 <= UnitsRes <= 9
-    manhattan_df['Is_Small_Building'] = (manhattan_df['UnitsRes'] >= 1) & (manhattan_df['UnitsRes'] <= 9)
+    is_small = manhattan_df['UnitsRes'].between(1, 9).to_numpy()
 
-    # 按 CD 分组统计
+    # 按 CD 分组统计 (区号 101~112 直接当 0~11 的下标，两次 bincount 代替 groupby)
     # Count: 总建筑数
     # Sum: 小楼数量
-    stats = manhattan_df.groupby('CD')['Is_Small_Building'].agg(['sum', 'count'])
+    codes = manhattan_df['CD'].to_numpy().astype(np.int64) - 101
+    counts = np.bincount(codes, minlength=12)
+    sums = np.bincount(codes[is_small], minlength=12)
+    present = counts > 0
+    cd_index = pd.Index(np.arange(101, 113)[present], name='CD').astype(manhattan_df['CD'].dtype)
+    stats = pd.DataFrame({'sum': sums[present], 'count': counts[present]}, index=cd_index)
     stats['Ratio'] = stats['sum'] / stats['count']
 
     print("\n=== 基于 MN.csv 算出的真实普及率 (Adoption Rate) ===")
@@ -35,8 +42,8 @@ def calculate_real_ratios(csv_path):
     # 生成字典代码供 copy
     print("\n请把下面这个字典复制到 solve5.py 中替换 REAL_BIN_ADOPTION_STOPS:")
     print("REAL_BIN_ADOPTION_STOPS = {")
-    for cd, row in stats.iterrows():
-        print(f"    {int(cd)}: {row['Ratio']:.3f},")
+    for cd, ratio in zip(stats.index, stats['Ratio'].to_numpy()):
+        print(f"    {int(cd)}: {ratio:.3f},")
     print("}")
 
 